@@ -61,7 +61,7 @@ class TwentyFourtyEightGameUI():
 		self.screen = tg.character_display.CharacterDisplay(80, 23) # the game UI creates a 80 x 24 character screen to draw the game upon
 		self.grid = tg.character_map.CharacterMap(4,4) # A character map to store a representation of the internal 4x4 grid 
 		self.grid.fill(' ') # clear the grid -- fill it with empty tiles
-		self.previous_grid = self.grid.clone() # have a previous copy of the grid to check for differences
+		self.previous_grid = self.grid.snapshot() # have a snapshot of the previous grid to check for differences
 		self.delay = 1/8.0 # A dilay pause time to time animations
 		self.done = False
 		self.exit = False
@@ -120,7 +120,7 @@ class TwentyFourtyEightGameUI():
 		self.render_grid()
 		self.screen.write_text(6, 13, "Game Over!") # write Game Over!
 		self.screen.show() # make sure to .show() so its visible on the console
-		tg.time.sleep(1.5) # sleep with no key presses
+		tg.sleep(1.5) # sleep with no key presses
 		tg.keyboard.getch(1.0) # wait for a key press for the last second. Also clears the keypresses for the next screen
 		
 	def score_tile(self, tile):
@@ -232,11 +232,11 @@ class TwentyFourtyEightGameUI():
 		self.slide_up()
 		self.render_grid()
 		self.screen.show()
-		tg.time.sleep(self.delay)
+		tg.sleep(self.delay)
 		self.combine_up()
 		self.render_grid()
 		self.screen.show()
-		tg.time.sleep(self.delay)
+		tg.sleep(self.delay)
 		self.slide_up()
 		
 	def down_pressed(self):
@@ -246,11 +246,11 @@ class TwentyFourtyEightGameUI():
 		self.slide_down()
 		self.render_grid()
 		self.screen.show()
-		tg.time.sleep(self.delay)
+		tg.sleep(self.delay)
 		self.combine_down()
 		self.render_grid()
 		self.screen.show()
-		tg.time.sleep(self.delay)
+		tg.sleep(self.delay)
 		self.slide_down()
 
 	def left_pressed(self):
@@ -260,11 +260,11 @@ class TwentyFourtyEightGameUI():
 		self.slide_left()
 		self.render_grid()
 		self.screen.show()
-		tg.time.sleep(self.delay)
+		tg.sleep(self.delay)
 		self.combine_left()
 		self.render_grid()
 		self.screen.show()
-		tg.time.sleep(self.delay)
+		tg.sleep(self.delay)
 		self.slide_left()
 
 	def right_pressed(self):
@@ -274,11 +274,11 @@ class TwentyFourtyEightGameUI():
 		self.slide_right()
 		self.render_grid()
 		self.screen.show()
-		tg.time.sleep(self.delay)
+		tg.sleep(self.delay)
 		self.combine_right()
 		self.render_grid()
 		self.screen.show()
-		tg.time.sleep(self.delay)
+		tg.sleep(self.delay)
 		self.slide_right()
 
 	def render_grid(self):
@@ -310,7 +310,7 @@ class TwentyFourtyEightGameUI():
 				self.show_gameover()
 				break
 
-			self.previous_grid.draw_image(0, 0, self.grid) # copy the grid onto the previous for storage
+			self.previous_grid = self.grid.snapshot() # remember the grid before the move. Nothing is copied until the move changes a row
 
 			k = tg.keyboard.getch(10.0) # get the keypress and slide tiles accordingly.
 			if k == tg.keyboard.KEY_UP:
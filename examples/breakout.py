@@ -141,7 +141,7 @@ class BreakoutGameUI():
 		self.screen.fill(' ')
 		self.screen.write_text(30, 10, "Lives: " + str(self.lives) )
 		self.screen.show()
-		tg.time.sleep(1.5)
+		tg.sleep(1.5)
 		tg.keyboard.getch(1.0)
 
 	def intro(self):
@@ -186,20 +186,20 @@ class BreakoutGameUI():
 		self.screen.fill(' ')
 		self.screen.write_text(30, 10, "Game Over!")
 		self.screen.show()
-		tg.time.sleep(1.5)
+		tg.sleep(1.5)
 		tg.keyboard.getch(1.0)
 		
 	def show_win(self):
 		self.screen.fill(' ')
 		self.screen.write_text(30, 10, "You Win!\nCongratulations!")
 		self.screen.show()
-		tg.time.sleep(1.5)
+		tg.sleep(1.5)
 		tg.keyboard.getch(1.0)
 
 	def play_round(self):
 		paddle = Paddle(40, 22, 8)
 		ball = Ball(5.0, 21.0)
-		metronome = tg.Metronome(1/30.0)
+		metronome = tg.Metronome(1/30.0, steady = True) # ticks exactly 1/30 of a second apart, so it really runs at 30 fps
 		ball.dx, ball.dy = .45, -.3
 		falling_bricks = []
 		while True:
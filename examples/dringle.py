@@ -6,6 +6,8 @@ sys.path.extend(['.', '..'])
 import tinygame as tg
 from copy import deepcopy
 
+UNDO_STEPS = 100 # how many moves can be taken back
+
 class Player():
 	LEFT = "<"
 	RIGHT = ">"
@@ -83,8 +85,8 @@ class DringleUI():
 		self.level = 0
 		self.board = None
 		self.player = None
-		self.previous_boards = [deepcopy(self.board)]
-		self.previous_players = [deepcopy(self.player)]
+		self.history = None # the undo history of the board. See load_level()
+		self.previous_players = []
 		self.display = tg.character_map.CharacterMap(16, 8)
 		self.x_margin = 4
 		self.y_margin = 2
@@ -96,8 +98,9 @@ class DringleUI():
 		position = self.player.x, self.player.y
 		x, y = position
 		if self.board.valid_move(position, direction):
-			self.previous_boards.append(deepcopy(self.board))
+			self.history.save() # a snapshot of the board only copies the rows the move changes
 			self.previous_players.append(deepcopy(self.player))
+			del self.previous_players[:-UNDO_STEPS] # the history forgets the oldest moves so forget their players too
 			dx, dy = direction
 			self.player.x += dx
 			self.player.y += dy
@@ -132,18 +135,13 @@ class DringleUI():
 		self.player.image = Player.RIGHT
 
 	def undo_move(self):
-		history_length = len(self.previous_boards)
-		if history_length > 0:
-			self.board = self.previous_boards[-1]
-			self.player = self.previous_players[-1]
-			self.previous_boards = self.previous_boards[0:history_length-1]
-			self.previous_players = self.previous_players[0:history_length-1]
+		if self.history.undo():
+			self.player = self.previous_players.pop()
 
 	def play_round(self):
 		self.load_level()
 		x,y = self.board.get_start()
 		self.player = Player(x, y)
-		self.previous_boards = []
 		self.previous_players = []
 		self.done = False
 		self.screen.fill(' ')
@@ -178,6 +176,7 @@ class DringleUI():
 	def load_level(self):
 		board_data = tg.character_map.load("examples/data/dringle/level" + str(self.level) + ".txt")
 		self.board = Board(board_data)
+		self.history = self.board.data.history(UNDO_STEPS)
 
 
 def main(args):
@@ -85,6 +85,7 @@ class Bird():
 		self.x, self.y = x,y # Set the desited position
 		self.dy = 0 # The derivitive of the y position (velocity). Note dx is always 0. See self.x
 		self.animation = [self.SPRITE0, self.SPRITE1, self.SPRITE2, self.SPRITE1] # Stick the appearances togther in a list for an animation
+		self.compiled_animation = [sprite.compile(' ') for sprite in self.animation] # The same animation precompiled with ' ' transparent so it is quick to draw every frame. See CharacterMap.compile()
 		self.age = 0 # Track the age of the Bird in frames
 
 	def animated_current_sprite(self):
@@ -101,7 +102,7 @@ class Bird():
 
 		character_map: A CharacterMap on which to draw the current animation image of the Bird	
 		"""
-		character_map.draw_image(int(self.x), int(self.y), self.animated_current_sprite(), ' ') # Draw the current Bird animation image at the current position
+		character_map.draw_image(int(self.x), int(self.y), self.compiled_animation[self.age//2 % len(self.animation)]) # Draw the current Bird animation image at the current position. It is the compiled version of animated_current_sprite()
 
 	def flap(self):
 		"""
@@ -217,7 +218,7 @@ class FlappyUI():
  ------------------------------------------------------'
 """)
 		tg.keyboard.getch(0) # Clear key presses
-		metronome = tg.Metronome(1/self.FPS) # Use a metronome to maintain specified fps
+		metronome = tg.Metronome(1/self.FPS, steady = True) # Use a metronome to maintain specified fps. Steady so it doesn't drift slower
 		idle = 0 # Track idle time to show high scores
 		while True: # Show the title until a kep press
 			k = tg.keyboard.getch() # Read the key press
@@ -246,7 +247,7 @@ class FlappyUI():
 		"""
 		The UI plays a round of Flappy Bird until the user hits something 
 		"""
-		metronome = tg.Metronome(1/self.FPS) # Use a metronome to maintain specified fps
+		metronome = tg.Metronome(1/self.FPS, steady = True) # Use a metronome to maintain specified fps. Steady so it doesn't drift slower
 
 		while not self.done:
 			k = tg.keyboard.getch() # Read key presses
@@ -291,7 +292,7 @@ class FlappyUI():
 				self.faby.draw(self.screen) # Draw the Bird with an X on it at the collision point
 				self.screen[cx,cy] = 'X'
 				self.screen.show() # Show the collision to the user
-				tg.time.sleep(1 if not self.cheat else .25) # Delay for a bit so the user sees it
+				tg.sleep(1 if not self.cheat else .25) # Delay for a bit so the user sees it
 				if not self.cheat: # If you are not cheating
 					self.done = True # Then the game if over
 
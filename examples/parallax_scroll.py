@@ -3,22 +3,33 @@ import sys
 sys.path.extend(['.', '..'])
 import tinygame as tg
 
+def load_layer(filename):
+    """
+    Loads a layer from a text file into a NumpyCharacterMap so the layers can be composited quickly (it is a plain CharacterMap if numpy is not installed)
+    """
+    image = tg.character_map.load(filename)
+    layer = tg.character_map.NumpyCharacterMap(image.width, image.height)
+    layer.draw_image(0, 0, image)
+    return layer
+
 def main():
     tg.initialize()
     try:
-        layer0 = tg.character_map.load("examples/data/parallax_scroll/layer0.txt")
-        layer1 = tg.character_map.load("examples/data/parallax_scroll/layer1.txt")
-        layer2 = tg.character_map.load("examples/data/parallax_scroll/layer2.txt")
+        layer0 = load_layer("examples/data/parallax_scroll/layer0.txt")
+        layer1 = load_layer("examples/data/parallax_scroll/layer1.txt")
+        layer2 = load_layer("examples/data/parallax_scroll/layer2.txt")
         screen = tg.character_display.CharacterDisplay(80, layer0.height)
+        composite = tg.character_map.NumpyCharacterMap(screen.width, screen.height) # composite the layers here first and then copy the finished frame to the screen in one go
         timer = tg.Metronome(1.0/25) # continue at 10 frames per second
         frame = 0
         while True:
             k = tg.keyboard.getch() # this will return a character from the keyboard if one is pressed otherwise None        
             if k != None:
                 break # go until a user presses a key
-            screen.draw_image(0, 0, layer0,'#')
-            screen.draw_image(0, 0, layer1,'#')
-            screen.draw_image(0, 0, layer2,'#')
+            composite.draw_image(0, 0, layer0,'#')
+            composite.draw_image(0, 0, layer1,'#')
+            composite.draw_image(0, 0, layer2,'#')
+            screen.draw_image(0, 0, composite)
             timer.wait_for_tick() # wait until the 1.0/10 second tick happens
             screen.show() # show the next frame
             frame += 1
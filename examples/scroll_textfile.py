@@ -15,8 +15,10 @@ try:
 			x += 1
 		if k == tg.keyboard.KEY_UP:
 			y -= 1
+			screen.scroll_down() # scroll what is showing too. Then the console is scrolled the same way and only the newly exposed row has to be sent
 		if k == tg.keyboard.KEY_DOWN:
 			y += 1
+			screen.scroll_up()
 		if k == tg.keyboard.KEY_ESCAPE:
 			break
 		screen.fill(' ')
@@ -104,7 +104,7 @@ class SnakeGameUI():
 		self.screen.fill(' ') # clears the screen
 		self.screen.write_text(30, 10, "Lives: " + str(self.lives) +"\n\nLevel: " + str(self.level) ) # Write the stats
 		self.screen.show() # make sure to .show() so the stats are visible on the console
-		tg.time.sleep(1.5) # sleep with no key presses
+		tg.sleep(1.5) # sleep with no key presses
 		tg.keyboard.getch(1.0) # wait for a key press for the last second. Also clears the keypresses for the next screen
 
 	def intro(self):
@@ -152,7 +152,7 @@ class SnakeGameUI():
 		self.screen.fill(' ')
 		self.screen.write_text(30, 10, "Game Over!") # write Game Over!
 		self.screen.show() # make sure to .show() so its visible on the console
-		tg.time.sleep(1.5) # sleep with no key presses
+		tg.sleep(1.5) # sleep with no key presses
 		tg.keyboard.getch(1.0) # wait for a key press for the last second. Also clears the keypresses for the next screen
 		
 	def show_win(self):
@@ -162,7 +162,7 @@ class SnakeGameUI():
 		self.screen.fill(' ')
 		self.screen.write_text(30, 10, "You Win!\nCongratulations!") # Write you win
 		self.screen.show() # make sure to .show() so its visible on the console
-		tg.time.sleep(1.5) # sleep with no key presses
+		tg.sleep(1.5) # sleep with no key presses
 		tg.keyboard.getch(1.0) # wait for a key press for the last second. Also clears the keypresses for the next screen
 
 	def play_round(self):
@@ -170,25 +170,31 @@ class SnakeGameUI():
 		The UI plays a round of Snake game. It plays at the current level until you die or progress
 		"""
 		nibbles = Snake(4, 5, 5, 5, 1, 0) # Create the users snake named nibbles
-		metronome = tg.Metronome(1/10.0) # Use a metronome to maintain 10 fps
 
 		bg = tg.character_map.load("examples/data/snake/level" + str(self.level) + ".txt") # load the level background from a text file into the bg CharacterMap
 		apple = None # For no2 we dont have a apple. One will be created during play
 		apples_eaten = 0 # track how many apples have been eaten this round so we know when we can progress a level
 
-		while True: # play forever until something happens
-			k = tg.keyboard.getch() # get the keypress and set nibbles direction (nibbles.dx, nibbles.dy) accordingly.
-			if k == tg.keyboard.KEY_UP and (nibbles.dx, nibbles.dy) != (0, 1):
-				nibbles.dx, nibbles.dy = 0, -1
-			if k == tg.keyboard.KEY_DOWN and (nibbles.dx, nibbles.dy) != (0, -1):
-				nibbles.dx, nibbles.dy = 0, 1
-			if k == tg.keyboard.KEY_LEFT and (nibbles.dx, nibbles.dy) != (1, 0):
-				nibbles.dx, nibbles.dy = -1, 0
-			if k == tg.keyboard.KEY_RIGHT and (nibbles.dx, nibbles.dy) != (-1, 0):
-				nibbles.dx, nibbles.dy = 1, 0
-			if k == tg.keyboard.KEY_ESCAPE:
-				self.done = True
-				break
+		def update(events):
+			"""
+			Plays one frame of the round. tinygame.run() calls it 10 times a second with the keys pressed since the last frame
+
+			return: False when the round is over
+			"""
+			nonlocal apple, apples_eaten # these are changed by every frame
+			moving = (nibbles.dx, nibbles.dy) # the direction nibbles moved last frame. He can't turn right around onto himself, even with two quick turns in one frame
+			for k, timestamp in events: # set nibbles direction (nibbles.dx, nibbles.dy) according to the keypresses
+				if k == tg.keyboard.KEY_UP and moving != (0, 1):
+					nibbles.dx, nibbles.dy = 0, -1
+				if k == tg.keyboard.KEY_DOWN and moving != (0, -1):
+					nibbles.dx, nibbles.dy = 0, 1
+				if k == tg.keyboard.KEY_LEFT and moving != (1, 0):
+					nibbles.dx, nibbles.dy = -1, 0
+				if k == tg.keyboard.KEY_RIGHT and moving != (-1, 0):
+					nibbles.dx, nibbles.dy = 1, 0
+				if k == tg.keyboard.KEY_ESCAPE:
+					self.done = True
+					return False
 
 			nibbles.tick() # nibbles handles his own movement. See the Snake.tick() method
 
@@ -207,7 +213,7 @@ class SnakeGameUI():
 				apples_eaten += 1 # track how many nibbles has eaten
 			elif self.screen[2*nibbles.x,nibbles.y] in ['|' , '[']: # check if the head has run into a wall or a body part
 				self.lives -= 1 # if so lose a life
-				break # and leave the round
+				return False # and leave the round
 
 			nibbles.draw_head(self.screen) # now draw the head
 
@@ -221,9 +227,9 @@ class SnakeGameUI():
 
 			if apples_eaten >= 8: # check if we've eaten enough apples
 				self.level += 1 # if so progress to the next stage
-				break # and stop the round
-			self.screen.show() # show the updated screen to the user once per frame -- now
-			metronome.wait_for_tick() # wait for a metronome tick to keep the pace of the game at one rate. This will keep pase even if we get key presses that exit keyboard.getch() early
+				return False # and stop the round
+
+		tg.run(update, self.screen.show, fps = 10) # play at 10 fps until the round is over, showing the updated screen to the user once per frame
 
 	def finalize(self):
 		self.highscore.handle_new_score(self.score, self.screen)
@@ -27,6 +27,7 @@ class Tetromino():
 		appearance180 = rotated(appearance90)
 		appearance270 = rotated(appearance180)
 		self.appearances = [appearance0, appearance90, appearance180, appearance270] # store all 4 of the pre-calculated rotations in a list
+		self.sprites = [appearance.compile(' ') for appearance in self.appearances] # and precompile them with ' ' blanks transparent for drawing quickly. See CharacterMap.compile()
 		self.angle_index = 0 # simply track the angle in increments of 90 degrees
 		self.undo = self.do_nothing # start our undo action as nothing. It points to a function to call to undo the last action
 
@@ -41,7 +42,7 @@ class Tetromino():
 		Draws the Tetromino on the given CharacterMap. The ' ' blanks are drawn transparent
 		"""
 		x,y, w, h = self.bounding_box() # find the bounding box
-		character_map.draw_image(x, y, self.appearance(), ' ') # draw from the bounding box (as related to the x,y location of the center)
+		character_map.draw_image(x, y, self.sprites[self.angle_index]) # draw the precompiled appearance from the bounding box (as related to the x,y location of the center). The ' ' blanks are transparent
 
 	def bounding_box(self):
 		# the box around this Tetromino is starts half width back and half height back from the center.
@@ -214,7 +215,7 @@ class TetrisGameUI():
 		self.screen.fill(' ')
 		self.screen.write_text(10, 5, "Game Over!") # write Game Over!
 		self.screen.show() # make sure to .show() so its visible on the console
-		tg.time.sleep(1.5) # sleep with no key presses
+		tg.sleep(1.5) # sleep with no key presses
 		tg.keyboard.getch(1.0) # wait for a key press for the last second. Also clears the keypresses for the next screen
 		
 	def get_rows_score(self, number_of_rows):
@@ -242,28 +243,33 @@ class TetrisGameUI():
 				if not tetromino.fits_in(bg): # check if the new Tetromino at the top fits in the screen
 					tetromino.draw(self.screen) # if not we dont have any more room and the game is over
 					self.screen.show() # show the user the problem
-					tg.time.sleep(.5)
+					tg.sleep(.5)
 					tg.keyboard.getch(.5)
 					self.show_gameover() # show the user game over
 					break # leave
 
-			k = tg.keyboard.getch(1/10.0) # get the keypress and change the Tetromino accordingly. Wait 1/10 of a second so the game progresses if no key is pressed
-			if k == tg.keyboard.KEY_LEFT:
-				tetromino.translate_left()
-			elif k == tg.keyboard.KEY_RIGHT:
-				tetromino.translate_right()
-			elif k == tg.keyboard.KEY_UP or k == 'x':
-				tetromino.rotate_ccw()
-			elif k == 'z':
-				tetromino.rotate_cw()
-			elif k == tg.keyboard.KEY_DOWN:
-				tetromino.advance()
-			elif k == tg.keyboard.KEY_ESCAPE:
-				self.exit = True
-				break
-
-			if not tetromino.fits_in(bg): # check if the move we did on the Tetromino allows it to fit
-				tetromino.undo() # if not undo the move
+			events = tg.keyboard.poll_events() # get every keypress since the last frame in order, so a quick left and rotate both happen
+			if not events: # if there were none wait 1/10 of a second for one so the game progresses if no key is pressed
+				event = tg.keyboard.next_event(1/10.0)
+				if event: events = [event]
+			for k, timestamp in events: # change the Tetromino according to each keypress
+				if k == tg.keyboard.KEY_LEFT:
+					tetromino.translate_left()
+				elif k == tg.keyboard.KEY_RIGHT:
+					tetromino.translate_right()
+				elif k == tg.keyboard.KEY_UP or k == 'x':
+					tetromino.rotate_ccw()
+				elif k == 'z':
+					tetromino.rotate_cw()
+				elif k == tg.keyboard.KEY_DOWN:
+					tetromino.advance()
+				elif k == tg.keyboard.KEY_ESCAPE:
+					self.exit = True
+					break
+
+				if not tetromino.fits_in(bg): # check if the move we did on the Tetromino allows it to fit
+					tetromino.undo() # if not undo the move
+			if self.exit: break
 
 			tetromino.advance() # The current Tetromino always advances down once per frame
 			if not tetromino.fits_in(bg): # check if it fits after moving down
@@ -301,7 +307,7 @@ class TetrisGameUI():
 				self.score += self.get_rows_score(number_completed_rows) # score the completed rows
 				self.lines += number_completed_rows # track number of lines
 				self.screen.show() # show the animation for row completion on screen and pause for effect
-				tg.time.sleep(.4)
+				tg.sleep(.4)
 
 		self.highscore.handle_new_score(self.score, self.screen)
 def main():
@@ -0,0 +1,45 @@
+"""
+Checks what the Terminal sends to the console when the frames change size
+"""
+
+from tinygame.character_display import Terminal, CLEAR_SEQUENCE, MOVE_HOME_SEQUENCE
+
+class MemoryTerminal(Terminal):
+	"""
+	A Terminal which keeps what it would write to the console
+	"""
+	def __init__(self):
+		Terminal.__init__(self)
+		self.output = bytearray()
+
+	def write(self, output):
+		self.output += output
+
+	def encoding(self):
+		return 'utf-8', 'strict'
+
+	def sent(self, rows):
+		"""
+		return: the text sent to show the rows
+		"""
+		del self.output[:]
+		self.present(rows)
+		return self.output.decode()
+
+def test_same_size_sends_only_changes():
+	terminal = MemoryTerminal()
+	terminal.sent(['abcdef', 'abcdef'])
+	assert CLEAR_SEQUENCE not in terminal.sent(['abcXef', 'abcdef'])
+	assert terminal.sent(['abcXef', 'abcdef']) == ''
+
+def test_shorter_rows_clear_and_redraw():
+	terminal = MemoryTerminal()
+	terminal.sent(['abcdef', 'abcdef'])
+	assert terminal.sent(['abc', 'abc']) == CLEAR_SEQUENCE + MOVE_HOME_SEQUENCE + 'abc\nabc'
+	assert terminal.front == ['abc', 'abc']
+
+def test_fewer_rows_clear_and_redraw():
+	terminal = MemoryTerminal()
+	terminal.sent(['abc', 'def', 'ghi'])
+	assert terminal.sent(['abc', 'def']) == CLEAR_SEQUENCE + MOVE_HOME_SEQUENCE + 'abc\ndef'
+	assert terminal.front == ['abc', 'def']
@@ -0,0 +1,153 @@
+"""
+Checks that every kind of CharacterMap behaves the same. NumpyCharacterMap must pass exactly the checks CharacterMap does, and so must the
+fallback NumpyCharacterMap is when numpy isn't installed
+"""
+
+import importlib.util
+import sys
+import pytest
+import tinygame.character_map as character_map
+
+def without_numpy():
+	"""
+	return: a separate copy of the character_map module, imported as if numpy wasn't installed
+	"""
+	saved = sys.modules.get('numpy')
+	sys.modules['numpy'] = None # makes import numpy raise ImportError
+	try:
+		spec = importlib.util.spec_from_file_location('character_map_without_numpy', character_map.__file__)
+		module = importlib.util.module_from_spec(spec)
+		spec.loader.exec_module(module)
+	finally:
+		if saved is None: del sys.modules['numpy']
+		else: sys.modules['numpy'] = saved
+	return module
+
+fallback = without_numpy()
+
+KINDS = [character_map.CharacterMap, fallback.NumpyCharacterMap]
+if character_map.numpy is not None: KINDS.append(character_map.NumpyCharacterMap)
+
+def make(kind, text):
+	"""
+	return: a map of the given kind holding the text, which must be rectangular
+	"""
+	lines = text.split('\n')
+	cmap = kind(len(lines[0]), len(lines))
+	cmap.write_text(0, 0, text)
+	return cmap
+
+def test_fallback_is_character_map():
+	assert fallback.numpy is None
+	assert fallback.NumpyCharacterMap is fallback.CharacterMap
+
+@pytest.fixture(params = KINDS, ids = lambda kind: '%s.%s' % (kind.__module__, kind.__name__))
+def kind(request):
+	return request.param
+
+def test_starts_blank(kind):
+	assert str(kind(3, 2)) == '   \n   '
+
+def test_get_and_set(kind):
+	cmap = kind(4, 3)
+	cmap[1, 2] = '*'
+	assert cmap[1, 2] == '*'
+	assert cmap[0, 0] == ' '
+	assert str(cmap) == '    \n    \n *  '
+
+def test_get_and_set_clipped(kind):
+	cmap = kind(4, 3)
+	for x_y in [(-1, 0), (4, 0), (0, -1), (0, 3)]:
+		cmap[x_y] = '*' # nothing happens off the map
+		assert cmap[x_y] is None
+	assert str(cmap) == '    \n    \n    '
+
+def test_fill(kind):
+	cmap = kind(3, 2)
+	cmap.fill('.')
+	assert str(cmap) == '...\n...'
+
+def test_write_text_clipped(kind):
+	cmap = kind(5, 3)
+	cmap.write_text(-2, -1, 'hidden\nabcdefg\nxy')
+	cmap.write_text(3, 2, 'long')
+	assert str(cmap) == 'cdefg\n     \n   lo'
+
+def test_draw_image(kind):
+	cmap = kind(5, 4)
+	cmap.fill('.')
+	cmap.draw_image(1, 1, make(kind, 'ab\ncd'))
+	assert str(cmap) == '.....\n.ab..\n.cd..\n.....'
+
+def test_draw_image_clipped(kind):
+	cmap = kind(4, 3)
+	cmap.fill('.')
+	image = make(kind, 'abc\ndef\nghi')
+	cmap.draw_image(-1, -1, image)
+	cmap.draw_image(3, 2, image)
+	assert str(cmap) == 'ef..\nhi..\n...a'
+	cmap.draw_image(10, 10, image) # all clipped away
+	assert str(cmap) == 'ef..\nhi..\n...a'
+
+def test_draw_image_chromakey(kind):
+	cmap = kind(4, 3)
+	cmap.fill('.')
+	cmap.draw_image(0, 0, make(kind, 'a b \n c d'), ' ')
+	assert str(cmap) == 'a.b.\n.c.d\n....'
+
+def test_draw_image_between_kinds(kind):
+	for other in KINDS:
+		cmap = kind(3, 2)
+		cmap.draw_image(0, 0, make(other, 'a-c\nd-f'), '-')
+		assert str(cmap) == 'a c\nd f'
+		back = other(3, 2)
+		back.draw_image(0, 0, cmap)
+		assert str(back) == 'a c\nd f'
+
+def test_draw_sprite(kind):
+	cmap = kind(4, 2)
+	cmap.fill('.')
+	cmap.draw_image(1, 0, make(kind, 'a b\n c ').compile(' '))
+	assert str(cmap) == '.a.b\n..c.'
+
+def test_scroll(kind):
+	cmap = make(kind, 'abc\ndef\nghi')
+	cmap.scroll_up()
+	assert str(cmap) == 'def\nghi\nabc'
+	cmap.scroll_down(2)
+	assert str(cmap) == 'ghi\nabc\ndef'
+	cmap.scroll_left()
+	assert str(cmap) == 'hig\nbca\nefd'
+	cmap.scroll_right(2)
+	assert str(cmap) == 'igh\ncab\nfde'
+
+def test_scrolled_then_drawn(kind):
+	cmap = make(kind, 'abc\ndef\nghi')
+	cmap.scroll_up()
+	cmap.scroll_left()
+	cmap[0, 0] = '*'
+	cmap.write_text(1, 2, 'XY')
+	assert str(cmap) == '*fd\nhig\nbXY'
+	assert cmap[2, 1] == 'g'
+
+def test_clone(kind):
+	cmap = make(kind, 'ab\ncd')
+	copy = cmap.clone()
+	cmap[0, 0] = '*'
+	assert str(copy) == 'ab\ncd'
+	assert (copy.width, copy.height) == (2, 2)
+
+def test_eq(kind):
+	for other in KINDS:
+		assert make(kind, 'ab\ncd') == make(other, 'ab\ncd')
+		assert make(kind, 'ab\ncd') != make(other, 'ab\nce')
+		assert make(kind, 'ab\ncd') != make(other, 'abc\ncde') # different sizes
+
+def test_str(kind):
+	assert str(make(kind, 'ab\ncd\nef')) == 'ab\ncd\nef'
+	assert str(kind(0, 0)) == ''
+
+def test_no_columns(kind):
+	cmap = kind(0, 1)
+	assert cmap == kind(0, 1)
+	assert str(cmap.clone()) == ''
@@ -0,0 +1,111 @@
+"""
+Checks KeyDecoder against made up keyboard input. See keyboard.py
+
+The input is random key presses of every kind (plain, UTF-8, invalid UTF-8, control and SS3 sequences with and without modifiers, Alt with a key and Esc on its own).
+It is fed to the decoder in chunks of random size, so keys are cut off between reads like they can be on a real console or connection,
+and must decode to the same keys as feeding each burst of presses at once
+"""
+
+import random
+import pytest
+from tinygame import keyboard
+from tinygame.keyboard import KeyDecoder, ESCAPE, CSI, SAME_KEYS, KEY_ESCAPE
+
+SEEDS = [0, 1, 2, 3] # fixed, so a failure can be repeated
+SIZE = 100000 # roughly how many bytes of input each seed makes
+
+SEQUENCES = [key for name, key in vars(keyboard).items() if name.startswith('KEY_') and key.startswith(ESCAPE) and key != ESCAPE] + list(SAME_KEYS)
+SEQUENCES += [CSI + "1;%d%s" % (held + 1, final) for held in range(1, 8) for final in "ABCDHFPQRS"] + [CSI + "%d;%d~" % (number, held + 1) for held in range(1, 8) for number in (2, 3, 5, 6, 15, 24)]
+CHARACTERS = [chr(i) for i in range(0, 128) if i != 0x1b] + ['é', 'ß', '€', '中', '😀']
+
+def press(generator):
+	"""
+	return: a pair of the bytes of a random key press and the keys they should be decoded into
+	"""
+	kind = generator.random()
+	if kind < 0.6:
+		key = generator.choice(CHARACTERS)
+		return key.encode('utf-8'), [key]
+	if kind < 0.85:
+		key = generator.choice(SEQUENCES)
+		return key.encode('latin-1'), [SAME_KEYS.get(key, key)]
+	if kind < 0.95: # Alt with a key is sent as ESC and the key
+		key = generator.choice([character for character in CHARACTERS if character not in '[O'])
+		return ESCAPE.encode() + key.encode('utf-8'), [KEY_ESCAPE, key]
+	return generator.choice([b'\xff', b'\xc3', b'\xe2\x82']) + b' ', ['\ufffd', ' '] # invalid or cut short UTF-8, followed by a key which doesn't continue it
+
+def bursts(generator):
+	"""
+	return: a pair of a list of bursts of key presses, each the bytes of up to 200 presses, and the keys they should all be decoded into.
+	        Each burst starts after the Esc timeout, so a lone ESC at the end of one is the Esc key
+	"""
+	data, expected = [], []
+	size = 0
+	while size < SIZE:
+		burst = bytearray()
+		for i in range(generator.randint(1, 200)):
+			pressed, keys = press(generator)
+			burst += pressed
+			expected += keys
+		if generator.random() < 0.3: # Esc on its own
+			burst += ESCAPE.encode()
+			expected.append(KEY_ESCAPE)
+		data.append(bytes(burst))
+		size += len(burst)
+	return data, expected
+
+def decode(data, chunk_sizes = None):
+	"""
+	Feeds bursts to a new KeyDecoder, one second apart
+
+	chunk_sizes: a random.Random to cut each burst into chunks of 1 to 64 bytes with, or None to feed each burst at once
+	return: the keys decoded
+	"""
+	decoder = KeyDecoder()
+	keys = []
+	now = 0.0
+	for burst in data:
+		i = 0
+		while i < len(burst):
+			size = len(burst) if chunk_sizes is None else chunk_sizes.randint(1, 64)
+			keys += decoder.feed(memoryview(burst)[i:i + size], now)
+			i += size
+		now += 1.0
+		keys += decoder.flush(now)
+	return keys
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_chunks_decode_like_whole_bursts(seed):
+	generator = random.Random(seed)
+	data, expected = bursts(generator)
+	whole = decode(data)
+	assert whole == expected
+	assert decode(data, generator) == whole
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_byte_at_a_time(seed):
+	generator = random.Random(seed)
+	data, expected = bursts(generator)
+	data = data[0:20] # a byte at a time is slow, so fewer
+	expected = decode(data)
+	decoder = KeyDecoder()
+	keys = []
+	for now, burst in enumerate(data):
+		for byte in burst: keys += decoder.feed(bytes([byte]), float(now))
+		keys += decoder.flush(now + 1.0)
+	assert keys == expected
+
+def test_lone_escape_waits_for_timeout():
+	decoder = KeyDecoder(escape_timeout = 0.05)
+	assert decoder.feed(b'\x1b', 0.0) == []
+	assert decoder.flush(0.01) == []
+	assert decoder.feed(b'[A', 0.02) == [keyboard.KEY_UP] # the rest of the sequence came in time
+	assert decoder.feed(b'\x1b', 1.0) == []
+	assert decoder.flush(1.1) == [KEY_ESCAPE]
+
+def test_utf8_split_between_reads():
+	decoder = KeyDecoder()
+	data = 'é😀'.encode('utf-8')
+	assert decoder.feed(data[0:1], 0.0) == []
+	assert decoder.feed(data[1:3], 0.0) == ['é']
+	assert decoder.feed(data[3:], 0.0) == ['😀']
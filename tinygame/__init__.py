@@ -7,12 +7,16 @@ as well as user input from the keyboard. (See keyboard.py). Unfortunately sound
 Example games reside in the examples/ directory
 """
 
-import time
+import os
+from collections import deque
 import tinygame.keyboard # import the keyboard submodule. See keyboard.py
 import tinygame.character_display # import the character_display submodule. See character_display.py
 import tinygame.character_map # import the character_map submodule. See character_map.py
+import tinygame.backend # import the backend submodule which decides where frames, keys and the time come from. See backend.py
+import tinygame.profile # import the profile submodule for timing the phases of each frame. See profile.py
+import tinygame.stats # import the stats submodule for counting the work done drawing each frame. See stats.py
 
-def initialize():
+def initialize(render_thread = False):
 	"""
 	Initializes the whole tinygame library.
 
@@ -28,9 +32,18 @@ def initialize():
 		... # game code
 	finally:
 		tinygame.quit()
+
+	render_thread: if True, shown frames are written to the console by a background thread so a slow console (eg over SSH) doesn't hold up the game. Frames it can't keep up with are skipped. See character_display.Terminal
+
+	If the TINYGAME_PROFILE environment variable is set the frames are profiled (see profile.py), and if TINYGAME_STATS is set the work done drawing them is counted (see stats.py)
 	"""
-	keyboard.initialize()
-	character_display.initialize()
+	counting = os.environ.get('TINYGAME_STATS', '')
+	if counting and counting != '0': stats.enable(counting if counting != '1' else None) # before the profiler, which must be undone first. See stats.enable()
+	profiling = os.environ.get('TINYGAME_PROFILE', '')
+	if profiling and profiling != '0' and not isinstance(backend.get(), profile.Profiler):
+		if profiling.startswith('allocations'): profile.allocations(gc_log = profiling == 'allocations+gc')
+		else: profile.start(hud = profiling == 'hud')
+	backend.get().initialize(render_thread) # normally initializes the keyboard and character_display submodules. See backend.py
 
 def quit():
 	"""
@@ -48,8 +61,60 @@ def quit():
 	finally:
 		tinygame.quit()
 	"""
-	keyboard.quit()
-	character_display.quit()
+	backend.get().quit() # normally de-initializes the keyboard and character_display submodules. See backend.py
+	if os.environ.get('TINYGAME_STATS', '') not in ('', '0'): stats.disable() # finishes the file of the counts of each frame
+
+def sleep(seconds):
+	"""
+	Waits for the number of seconds given, like time.sleep(). Use this in games instead of time.sleep() so they can also run headless, where no real time passes. See backend.py
+
+	seconds: a float for the amount of time to wait
+	"""
+	backend.get().sleep(seconds)
+
+def run(update, render, fps = 10, max_skipped = 5):
+	"""
+	Runs the main loop of a game: it updates the game a fixed number of times per second (ticks) with the keys pressed, and shows a frame after each tick.
+
+	Between ticks it waits for keys and the next tick at the same time (normally in one select() on the keyboard, see keyboard.next_event()),
+	so a key is read the moment it is pressed and no time is wasted checking over and over. Each key is given to the next update with the time it was pressed.
+	If the game falls behind (eg a frame was slow to show) the missed ticks are caught up with extra updates before the next frame, so the game still runs at the same speed.
+	After more than max_skipped missed ticks it gives up on the rest instead, rather than freezing while it catches up
+
+	eg
+
+	def update(events):
+		for key, timestamp in events:
+			if key == tinygame.keyboard.KEY_ESCAPE: return False # the end of the game
+			...
+		... # game logic for one tick
+	tinygame.run(update, screen.show, fps = 24)
+
+	update: a function taking a list of the (key, timestamp) events since the last update (like keyboard.poll_events() returns) which moves the game on by one tick. If it returns False run() ends
+	render: a function with no arguments which draws and shows the frame. eg screen.show
+	fps: the number of ticks per second
+	max_skipped: the most missed ticks to catch up on at once
+	"""
+	clock = backend.get() # the keys and time come from the backend. See backend.py
+	period = 1.0/fps
+	next_tick = clock.time() # when the next update is due. It moves on by exactly one period each tick so the ticks don't drift
+	events = [] # the keys pressed since the last update
+	while True:
+		now = clock.time()
+		if now < next_tick: # wait for a key or the next tick, whichever comes first
+			event = clock.next_event(next_tick - now)
+			if event: events.append(event)
+			continue
+		updates = 0
+		while now >= next_tick: # one update for each tick due, normally just one
+			if update(events) is False: return
+			events = []
+			next_tick += period
+			updates += 1
+			if updates > max_skipped: # too far behind to catch up, so skip the rest of the missed ticks
+				next_tick = now + period
+				break
+		render()
 
 class Metronome():
 	"""
@@ -73,33 +138,91 @@ class Metronome():
 	The reason for this is because you want to be spending as much time as possible allowing the user to input keys and not idling
 	waiting for the next frame. They work best in combination since wait_for_tick() will return immediately if the time period of a frame
 	has already passed. It is simply a way to ensure a whole period is respected if a key hit registers early on and returns from getch() early.
-	See keyboard.py and examples/snake.py
+	See keyboard.py and examples/breakout.py. tinygame.run() does all of this for you, see run() and examples/snake.py
+
+	By default each tick is a whole period after wait_for_tick() last returned, so any time it oversleeps (and the time until it is called if a frame takes too long)
+	makes the next tick later, and the game runs a little slower than it should. With steady = True the ticks are instead exactly a period apart
+	(the next tick is due a period after the last one was due, not after it happened) so they don't drift, and missed ticks are skipped. See wait_for_tick()
+	stats() tells how close to the ticks it really wakes up, eg for tuning a game on slow hardware
 	"""
-	def __init__(self, period):
+	def __init__(self, period, steady = False, spin = 0):
 		"""
 		Creates a metronome with the specified tick rate as a floating point peroid between ticks
 
 		period: a float representing the amount of time (in seconds) between beats. eg 0.1 for 10 beats a second
+		steady: True for ticks exactly a period apart which don't drift
+		spin: how long before a tick (in seconds) to stop sleeping and check the time over and over instead. eg 0.0005. Sleeping can overshoot by a millisecond or more while checking doesn't, but keeps the processor busy
 		"""
 		self.period = period
+		self.steady = steady
+		self.spin = spin
+		self.ticks = 0 # how many ticks it has woken up for
+		self.missed = 0 # how many ticks were skipped because the game was too far behind. Only in steady mode
+		self.total_error = 0.0 # the total of how late it woke up for each tick, in seconds
+		self.max_error = 0.0 # the latest it woke up for a tick
+		self.errors = deque(maxlen = 1000) # how late it woke up for each of the most recent ticks
 		self.reset()
 
 	def reset(self):
 		"""
 		Resets the since tick in the metronome. The time of the most recent tick is set to now.
 		"""
-		self.previous = time.time() # use the current time now as the most recent tick
+		self.previous = backend.get().time() # use the current time now as the most recent tick
 
 	def wait_for_tick(self):
 		"""
-		Sleeps until the next tick of the metronome. If a tick has already occured since last calling wait_for_tick() an exception is caught and it returns immediately
+		Sleeps until the next tick of the metronome. If a tick has already occured since last calling wait_for_tick() it returns immediately
+
+		In steady mode, if whole ticks have gone by since the one which was due they are skipped: it returns immediately and the next tick is a period after the latest one which went by
+		return: the number of ticks skipped, which is 0 unless in steady mode. A game can update that many extra times to catch up
+		"""
+		clock = backend.get() # use the backend's clock and sleep (normally time.perf_counter and time.sleep) to sleep until the next tick
+		due = self.previous + self.period
+		skipped = 0
+		now = clock.time()
+		if now < due:
+			self.sleep_until(clock, due)
+		elif self.steady and now - due >= self.period: # at least a whole tick late
+			skipped = int((now - due)/self.period)
+			due += skipped*self.period
+			self.missed += skipped
+		now = clock.time()
+		error = max(0.0, now - due)
+		self.ticks += 1
+		self.total_error += error
+		self.max_error = max(self.max_error, error)
+		self.errors.append(error)
+		self.previous = due if self.steady else now # the next tick is a period after this one was due, or after now if it isn't steady
+		return skipped
+
+	def sleep_until(self, clock, due):
+		"""
+		Sleeps until the time given, spinning for the last self.spin seconds
+		"""
+		clock.sleep(max(0, due - self.spin - clock.time()))
+		previous = None
+		while True:
+			now = clock.time()
+			if now >= due: return
+			if now == previous: # the clock doesn't move by itself, eg a headless backend's, so checking it again won't help
+				clock.sleep(due - now)
+				return
+			previous = now
+
+	def stats(self):
+		"""
+		return: a dictionary of how well it kept time: 'ticks' the number of ticks, 'missed' the number skipped,
+		        'mean_error', 'p99_error' and 'max_error' the mean, 99th percentile and most seconds late it woke up for a tick.
+		        The 99th percentile is of the most recent 1000 ticks
 		"""
-		try: # use the time.sleep to sleep until the next tick
-			time.sleep(max(0, self.period - (time.time() - self.previous)))
-		except (IOError, TypeError) as e: # simply catch the exceptions when we have to seleep negative time (tick already passed) or no previous time was specified
-			pass
-		finally:
-			self.reset() # always set the time of last tick to now
+		errors = sorted(self.errors)
+		return {
+			'ticks': self.ticks,
+			'missed': self.missed,
+			'mean_error': self.total_error/self.ticks if self.ticks else 0.0,
+			'p99_error': errors[int(0.99*(len(errors) - 1))] if errors else 0.0,
+			'max_error': self.max_error,
+		}
 
 class HighScoresGUI():
 	"""
@@ -135,8 +258,7 @@ class HighScoresGUI():
 			line = "%2d: %s ...... %d\n"%(i, name, score)
 			text += line
 			maxlen = max(maxlen, len(line))
-		x = plate.width // 2 - 9
-		plate.write_text(x, 0, "*** High Scores ***") # write the text into a high scores screen
+		plate.write_text_aligned(0, 0, plate.width, "*** High Scores ***", 'center') # write the text into a high scores screen
 		x = plate.width // 2 - maxlen // 2
 		plate.write_text(x, 2, text)
 
@@ -188,9 +310,8 @@ class HighScoresGUI():
 			"""
 			An inner helper function to refresh the screen display as the name is typed
 			"""
-			x = screen.width//2 - 7
 			screen.fill(' ')
-			screen.write_text(x, 1, "New High Score!")
+			screen.write_text_aligned(0, 1, screen.width, "New High Score!", 'center')
 			x = screen.width//2 - (maxlen + 12)//2
 			screen.write_text(x,3, "Enter Name: " + name)
 			screen.show()
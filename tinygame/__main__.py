@@ -1,4 +1,22 @@
-print("""
+"""
+The entry point for running tinygame as a program with python -m tinygame
+
+With no arguments it refers you to the example games. It also has commands, eg
+ python -m tinygame record session.tgr examples/snake.py	record a game to a file while playing it (see recording.py)
+ python -m tinygame replay session.tgr --speed 4x	play a recording back 4 times faster
+ python -m tinygame export session.tgr 100	print frame 100 of a recording
+ python -m tinygame serve examples/snake.py --port 2323	host a game for players connecting with telnet (see server.py)
+ python -m tinygame broadcast /tmp/game.sock examples/tetris.py	play a game while others watch it (see broadcast.py)
+ python -m tinygame watch /tmp/game.sock	watch a game being played
+ python -m tinygame bench --baseline results.json	time the library's most used operations and compare them to results saved before (see bench.py)
+ python -m tinygame bench --games --save games.json	play the example games headless and measure their frames
+"""
+
+import argparse
+import runpy
+import sys
+
+HELP = """
 Tinygame is a game library. See ./doc/tinygame.html
  
 Example games are located in  ./examples/
@@ -6,4 +24,105 @@ Example games are located in  ./examples/
 e.g., you can play tetris with:
  python examples/tetris.py
 
-""")
+Run python -m tinygame --help to see the commands it has
+"""
+
+def speed(text):
+	"""
+	return: the float in a speed given on the command line. eg 4 for '4x' or '4'
+	"""
+	return float(text[:-1] if text.endswith('x') else text)
+
+def record(arguments):
+	from tinygame import recording
+	recording.record(arguments.file)
+	sys.argv = [arguments.game] + arguments.arguments # the game sees its own arguments like it was run directly
+	runpy.run_path(arguments.game, run_name = "__main__")
+
+def replay(arguments):
+	from tinygame import recording
+	try:
+		recording.replay(arguments.file, arguments.speed)
+	except ValueError as e: # not a recording
+		sys.exit(e)
+
+def export(arguments):
+	from tinygame import recording
+	try:
+		time, rows = recording.Recording(arguments.file).frame(arguments.frame)
+	except (ValueError, IndexError) as e: # not a recording or no such frame
+		sys.exit(e)
+	print('\n'.join(rows))
+
+def serve(arguments):
+	from tinygame import server
+	server.serve(arguments.game, arguments.host, arguments.port)
+
+def broadcast(arguments):
+	from tinygame import broadcast
+	broadcast.broadcast(arguments.socket)
+	sys.argv = [arguments.game] + arguments.arguments
+	runpy.run_path(arguments.game, run_name = "__main__")
+
+def watch(arguments):
+	from tinygame import broadcast
+	try:
+		broadcast.watch(arguments.socket)
+	except OSError as e: # eg nothing is being broadcast there
+		sys.exit(e)
+
+def bench(arguments):
+	from tinygame import bench
+	try:
+		passed = bench.main(arguments.only, arguments.repeat, arguments.time, arguments.save, arguments.baseline, arguments.threshold, arguments.games, arguments.seconds, arguments.seed)
+	except (OSError, ValueError) as e: # eg the baseline file is missing or isn't JSON
+		sys.exit(e)
+	if not passed: sys.exit(1) # so a script (eg a CI job) can reject the change
+
+def main():
+	if len(sys.argv) == 1:
+		print(HELP)
+		return
+	parser = argparse.ArgumentParser(prog = "python -m tinygame", description = "Tinygame is a game library. See ./doc/tinygame.html")
+	commands = parser.add_subparsers(dest = "command", required = True)
+	command = commands.add_parser("record", help = "record the frames of a game to a file while playing it")
+	command.add_argument("file", help = "the recording file to make")
+	command.add_argument("game", help = "the game's python file. eg examples/snake.py")
+	command.add_argument("arguments", nargs = argparse.REMAINDER, help = "arguments for the game")
+	command.set_defaults(run = record)
+	command = commands.add_parser("replay", help = "play a recording back on the console. Press Esc to stop")
+	command.add_argument("file", help = "the recording file")
+	command.add_argument("--speed", type = speed, default = 1.0, help = "how many times faster than real time to play it. eg 4x")
+	command.set_defaults(run = replay)
+	command = commands.add_parser("export", help = "print one frame of a recording as text")
+	command.add_argument("file", help = "the recording file")
+	command.add_argument("frame", type = int, help = "the frame number, counting from 0")
+	command.set_defaults(run = export)
+	command = commands.add_parser("serve", help = "host a game for many players connecting with telnet")
+	command.add_argument("game", help = "the game's python file. eg examples/snake.py")
+	command.add_argument("--host", default = "127.0.0.1", help = "the address to accept connections on. Use 0.0.0.0 for every network")
+	command.add_argument("--port", type = int, default = 2323, help = "the TCP port to accept connections on")
+	command.set_defaults(run = serve)
+	command = commands.add_parser("broadcast", help = "play a game while others watch it")
+	command.add_argument("socket", help = "the file name of the Unix domain socket to broadcast on. eg /tmp/game.sock")
+	command.add_argument("game", help = "the game's python file. eg examples/tetris.py")
+	command.add_argument("arguments", nargs = argparse.REMAINDER, help = "arguments for the game")
+	command.set_defaults(run = broadcast)
+	command = commands.add_parser("watch", help = "watch a game being broadcast")
+	command.add_argument("socket", help = "the file name of the broadcast's Unix domain socket")
+	command.set_defaults(run = watch)
+	command = commands.add_parser("bench", help = "time the library's most used operations, optionally comparing them to saved results")
+	command.add_argument("--only", help = "only run the benchmarks with this in their name. eg draw_image")
+	command.add_argument("--repeat", type = int, default = 5, help = "how many rounds to time each benchmark for")
+	command.add_argument("--time", type = float, default = 0.2, help = "about how many seconds each round takes")
+	command.add_argument("--save", help = "a JSON file to save the results to")
+	command.add_argument("--baseline", help = "a JSON file of results saved before to compare to")
+	command.add_argument("--threshold", type = float, default = 10.0, help = "how many percent slower than the baseline counts as a regression")
+	command.add_argument("--games", action = "store_true", help = "play the example games headless instead and measure their frames (a macro benchmark)")
+	command.add_argument("--seconds", type = float, default = 60.0, help = "with --games, how many seconds of game time to play each game for")
+	command.add_argument("--seed", type = int, default = 0, help = "with --games, for the random key presses and the games' random numbers")
+	command.set_defaults(run = bench)
+	arguments = parser.parse_args()
+	arguments.run(arguments)
+
+main()
@@ -0,0 +1,197 @@
+"""
+backend
+A submodule of tinygame which decides where the games are shown, where their key presses come from and what time it is.
+
+Normally that is the user's console, the keyboard and the real clock (a ConsoleBackend).
+A HeadlessBackend instead keeps the frames which are shown in memory, takes key presses from a script and has a virtual clock.
+Sleeping and waiting for keys just move the virtual clock forward, so a game runs as fast as it can without a console. eg for tests, soak tests and benchmarks
+
+eg
+
+tinygame.backend.use(tinygame.backend.HeadlessBackend(keys = [' ', tinygame.keyboard.KEY_UP, (30.0, tinygame.keyboard.KEY_ESCAPE)]))
+tinygame.initialize()
+try:
+	... # game code
+finally:
+	tinygame.quit()
+print(tinygame.backend.get().screen()) # the last frame shown
+"""
+
+import threading
+import time
+from collections import deque
+
+class ConsoleBackend():
+	"""
+	The user's console, keyboard and the real clock. This is what tinygame uses unless use() is called
+	"""
+	def initialize(self, render_thread = False):
+		"""
+		Sets up the console and keyboard for the game. See tinygame.initialize()
+		"""
+		from tinygame import keyboard, character_display # imported here because they use this module themselves
+		keyboard.initialize()
+		character_display.initialize(render_thread)
+
+	def quit(self):
+		"""
+		Restores the console and keyboard to how they were. See tinygame.quit()
+		"""
+		from tinygame import keyboard, character_display
+		keyboard.quit()
+		character_display.quit()
+
+	def present(self, rows, scrolled = 0):
+		"""
+		Shows a frame on the console. See character_display.Terminal.present()
+		"""
+		from tinygame import character_display
+		character_display.terminal.present(rows, scrolled)
+
+	def invalidate(self):
+		"""
+		Forgets what is on the console so the next frame is drawn in full. See character_display.Terminal.invalidate()
+		"""
+		from tinygame import character_display
+		character_display.terminal.invalidate()
+
+	def poll_events(self):
+		"""
+		Takes the keys pressed on the keyboard. See keyboard.poll_events()
+		"""
+		from tinygame import keyboard
+		return keyboard.poll_console_events()
+
+	def next_event(self, timeout = 0):
+		"""
+		Takes the first key pressed on the keyboard. See keyboard.next_event()
+		"""
+		from tinygame import keyboard
+		return keyboard.next_console_event(timeout)
+
+	def time(self):
+		"""
+		return: the current time in seconds from a clock which never goes backwards, even if the computer's date and time are changed (time.perf_counter()). Only the time between two of them means anything
+		"""
+		return time.perf_counter()
+
+	def sleep(self, seconds):
+		"""
+		Waits for the number of seconds given, like time.sleep()
+		"""
+		time.sleep(seconds)
+
+class HeadlessBackend():
+	"""
+	A backend without a console or keyboard, running on a virtual clock.
+
+	Frames are kept in self.frames, keys are taken from self.keys and time only passes when the game sleeps or waits for a key.
+	"""
+	def __init__(self, keys = (), keep = 1):
+		"""
+		Creates a headless backend with its clock at 0
+
+		keys: the key presses to give the game, in order. Each is either a key string (eg keyboard.KEY_UP), which is pressed as soon as the game asks for a key,
+		      or a (time, key) pair, which is pressed when the clock reaches that time
+		keep: how many of the most recent frames to keep in self.frames. None keeps all of them
+		"""
+		self.clock = 0.0 # the virtual time in seconds
+		self.keys = deque() # the (time, key) pairs still to be pressed, in order
+		for key in keys: self.press(key)
+		self.frames = deque(maxlen = keep) # (time, rows) for each frame shown. The oldest are forgotten when there are more than keep
+		self.frames_shown = 0 # how many frames have been shown in total
+		self.poll_time = 0.001 # the least time that passes each time the game asks for a key. Otherwise a game calling getch() in a loop without sleeping would never get to the next key
+
+	def press(self, key):
+		"""
+		Adds a key press to the end of the script. See __init__()
+		"""
+		if not isinstance(key, tuple): key = (0.0, key) # due right away
+		self.keys.append(key)
+
+	def initialize(self, render_thread = False):
+		pass # there is no console or keyboard to set up
+
+	def quit(self):
+		pass
+
+	def present(self, rows, scrolled = 0):
+		"""
+		Keeps a frame in self.frames. The rows are never changed later so they don't need to be copied
+		"""
+		self.frames.append((self.clock, rows))
+		self.frames_shown += 1
+
+	def invalidate(self):
+		pass # every frame is kept in full anyway
+
+	def screen(self):
+		"""
+		return: the text of the most recent frame, like str() of the display which was shown. An empty string if nothing was shown
+		"""
+		return '\n'.join(self.frames[-1][1]) if self.frames else ''
+
+	def poll_events(self):
+		"""
+		Gives the game the key presses from the script which are due, like keyboard.poll_events()
+		"""
+		events = []
+		while self.keys and self.keys[0][0] <= self.clock:
+			due, key = self.keys.popleft()
+			events.append((key, self.clock))
+		return events
+
+	def next_event(self, timeout = 0):
+		"""
+		Gives the game the next key press from the script, like keyboard.next_event().
+
+		If the next one isn't due yet the clock jumps ahead to when it is, or by timeout if that comes first (and None is returned)
+		"""
+		timeout = max(timeout, self.poll_time)
+		if self.keys and self.keys[0][0] <= self.clock + timeout:
+			due, key = self.keys.popleft()
+			self.clock = max(self.clock, due)
+			return (key, self.clock)
+		self.clock += timeout
+		return None
+
+	def time(self):
+		"""
+		return: the virtual time in seconds
+		"""
+		return self.clock
+
+	def sleep(self, seconds):
+		"""
+		Moves the virtual clock forward instead of waiting
+		"""
+		self.clock += max(0, seconds)
+
+current = ConsoleBackend() # the backend tinygame is using
+local = threading.local() # the backend for just one thread, if it has its own. eg each game session of a server (see server.py)
+
+def get():
+	"""
+	return: the backend to use in this thread. This is current unless the thread was given its own with use_in_thread()
+	"""
+	return getattr(local, 'backend', None) or current
+
+def use(backend):
+	"""
+	Makes tinygame use another backend. Call it before tinygame.initialize()
+
+	backend: eg a HeadlessBackend
+	return: the backend which was in use before
+	"""
+	global current
+	previous = current
+	current = backend
+	return previous
+
+def use_in_thread(backend):
+	"""
+	Makes tinygame use a backend in just the thread calling this, so several games can run at the same time each in its own thread
+
+	backend: the backend for this thread, or None to go back to using current
+	"""
+	local.backend = backend
@@ -0,0 +1,478 @@
+"""
+bench
+A submodule of tinygame which measures how fast the library's most used operations are (microbenchmarks), so changes which slow them down can be caught
+
+Run it from the command line with
+ python -m tinygame bench --save results.json
+and to compare a change against those results
+ python -m tinygame bench --baseline results.json --threshold 10
+which fails (exits with status 1) if any benchmark got more than 10% slower.
+
+Each benchmark is timed for a number of rounds (repeats). Each round calls the operation as many times as fit in about --time seconds and
+works out the operations per second, so the results show the mean and how much they varied between rounds.
+The results are only comparable on the same computer, so save a baseline before making a change and compare on the same machine
+
+With --games it instead plays each example game headless (a macro benchmark), to see how the whole library performs in a real game:
+ python -m tinygame bench --games --save games.json
+Each game gets the same made up key presses every time (from --seed) and runs on a virtual clock for --seconds of game time (see backend.HeadlessBackend),
+so sleeping and waiting for keys take no real time. Its frames are encoded for a console like usual and then thrown away.
+The result is how many frames per second it could have shown (frames per real second), how long each frame really took and how many bytes each frame sent to the console
+"""
+
+import json
+import os
+import platform
+import random
+import runpy
+import statistics
+import sys
+import tempfile
+import time
+import tinygame.backend as backend
+from tinygame.character_map import CharacterMap, NumpyCharacterMap, parse, load, numpy
+from tinygame.character_display import CharacterDisplay, Terminal, CSI
+from tinygame.keyboard import KeyDecoder
+
+class SinkTerminal(Terminal):
+	"""
+	A Terminal (see character_display.py) which throws away what it would write to the console, only counting the bytes. So CharacterDisplay.show() is timed without the console
+	"""
+	def __init__(self):
+		Terminal.__init__(self)
+		self.bytes_written = 0
+
+	def write(self, output):
+		self.bytes_written += len(output)
+
+	def encoding(self):
+		return 'utf-8', 'replace'
+
+class SinkBackend(backend.HeadlessBackend):
+	"""
+	A headless backend (see backend.py) which encodes each frame for a console like the ConsoleBackend does, but into a SinkTerminal
+	"""
+	def __init__(self):
+		backend.HeadlessBackend.__init__(self)
+		self.terminal = SinkTerminal()
+
+	def present(self, rows, scrolled = 0):
+		self.terminal.present(rows, scrolled)
+
+	def invalidate(self):
+		self.terminal.invalidate()
+
+def picture(width, height):
+	"""
+	return: a CharacterMap of the given size with a different character in every cell of a row, and some blanks to be see through with a chromakey
+	"""
+	image = CharacterMap(width, height)
+	for y in range(0, height):
+		image.write_text(0, y, ''.join(chr(ord('a') + (x + y) % 26) if (x + y) % 5 else ' ' for x in range(0, width)))
+	return image
+
+# The benchmarks. Each one sets itself up and returns a function which does the operation and how many operations each call of that function does.
+# Doing several operations per call (eg setting 100 cells) keeps the cost of calling the function itself out of the result for the tiny operations
+
+def bench_setitem():
+	image = CharacterMap(80, 24)
+	cells = [(x*7 % 80, x % 24) for x in range(0, 100)]
+	def operation():
+		for x_y in cells: image[x_y] = '#'
+	return operation, len(cells)
+
+def bench_getitem():
+	image = picture(80, 24)
+	cells = [(x*7 % 80, x % 24) for x in range(0, 100)]
+	def operation():
+		for x_y in cells: image[x_y]
+	return operation, len(cells)
+
+def bench_draw_image(size, chromakey, kind = CharacterMap):
+	def setup():
+		width, height = size
+		target = kind(80, 24)
+		image = picture(width, height)
+		if kind is not CharacterMap: # the same picture in the other kind of map
+			other = kind(width, height)
+			other.draw_image(0, 0, image)
+			image = other
+		def operation():
+			target.draw_image(3, 2, image, chromakey)
+		return operation, 1
+	return setup
+
+def bench_write_text(text):
+	def setup():
+		image = CharacterMap(80, 24)
+		def operation():
+			image.write_text(2, 3, text)
+		return operation, 1
+	return setup
+
+def bench_method(name, *arguments):
+	"""
+	return: a benchmark which calls a method of an 80x24 CharacterMap
+	"""
+	def setup():
+		method = getattr(picture(80, 24), name)
+		def operation():
+			method(*arguments)
+		return operation, 1
+	return setup
+
+def bench_eq():
+	first, second = picture(80, 24), picture(80, 24) # equal, so every cell has to be compared
+	def operation():
+		first == second
+	return operation, 1
+
+def bench_snapshot():
+	image = picture(80, 24)
+	def operation():
+		before = image.snapshot()
+		image[5, 5] = '#' # the first write after a snapshot copies that row
+	return operation, 1
+
+def bench_eq_snapshot():
+	image = picture(80, 24)
+	before = image.snapshot()
+	image[5, 5] = '#' # one row changed, so only it has to be compared
+	def operation():
+		image == before
+	return operation, 1
+
+def big_text():
+	"""
+	return: the text of a big picture, 200 columns by 200 rows
+	"""
+	return str(picture(200, 200))
+
+def bench_parse():
+	text = big_text()
+	def operation():
+		parse(text)
+	return operation, 1
+
+def bench_load():
+	handle, path = tempfile.mkstemp(suffix = '.txt')
+	with os.fdopen(handle, 'w') as f:
+		f.write(big_text())
+	def operation():
+		load(path)
+	operation.cleanup = lambda: os.unlink(path)
+	return operation, 1
+
+def bench_decode_keys():
+	generator = random.Random(0)
+	presses = ['a', ' ', 'é', CSI + 'A', CSI + '1;5C', CSI + '15~', '\x1bOP', '\x1bx'] # plain, UTF-8, sequences with and without modifiers, SS3 and Alt with a key
+	data = ''.join(generator.choice(presses) for i in range(0, 1000)).encode('utf-8')
+	decoder = KeyDecoder()
+	def operation():
+		decoder.feed(data, 0.0)
+	return operation, len(data) # so the rate is bytes decoded per second
+
+def bench_show(rows_changed):
+	"""
+	return: a benchmark which shows a CharacterDisplay, with the given number of rows changed each time, into a SinkTerminal
+	"""
+	def setup():
+		display = CharacterDisplay(80, 24)
+		display.draw_image(0, 0, picture(80, 24))
+		sink = SinkBackend()
+		frame = [0]
+		def operation():
+			frame[0] += 1
+			character = chr(ord('A') + frame[0] % 26)
+			for y in range(0, rows_changed): display.write_text(10, y, character*20) # a different run in each changed row every frame
+			display.show()
+		operation.backend = sink # shown frames go to the sink, not the console
+		return operation, 1
+	return setup
+
+BENCHMARKS = [
+	('map.setitem', bench_setitem),
+	('map.getitem', bench_getitem),
+	('map.draw_image 8x4', bench_draw_image((8, 4), None)),
+	('map.draw_image 8x4 chromakey', bench_draw_image((8, 4), ' ')),
+	('map.draw_image 40x12', bench_draw_image((40, 12), None)),
+	('map.draw_image 40x12 chromakey', bench_draw_image((40, 12), ' ')),
+	('map.draw_image 80x24', bench_draw_image((80, 24), None)),
+	('map.draw_image 80x24 chromakey', bench_draw_image((80, 24), ' ')),
+	('map.write_text line', bench_write_text("Score: 12345 Lives: 3 Level: 7")),
+	('map.write_text 5 lines', bench_write_text("*** High Scores ***\n\n 1: Nick ...... 9000\n 2: Bob ...... 100\n 3: None ...... 0")),
+	('map.fill', bench_method('fill', '.')),
+	('map.clone', bench_method('clone')),
+	('map.scroll_up', bench_method('scroll_up')),
+	('map.scroll_down', bench_method('scroll_down')),
+	('map.scroll_left', bench_method('scroll_left')),
+	('map.scroll_right', bench_method('scroll_right')),
+	('map.str', bench_method('__str__')),
+	('map.eq', bench_eq),
+	('map.snapshot', bench_snapshot),
+	('map.eq snapshot', bench_eq_snapshot),
+	('map.parse 200x200', bench_parse),
+	('map.load 200x200', bench_load),
+	('keyboard.decode bytes', bench_decode_keys),
+	('display.show 1 row', bench_show(1)),
+	('display.show 24 rows', bench_show(24)),
+]
+if numpy is not None: # numpy is optional. See NumpyCharacterMap
+	BENCHMARKS += [
+		('numpy.draw_image 80x24', bench_draw_image((80, 24), None, NumpyCharacterMap)),
+		('numpy.draw_image 80x24 chromakey', bench_draw_image((80, 24), ' ', NumpyCharacterMap)),
+	]
+
+class Finished(Exception):
+	"""
+	Raised in a game played by play() when its time is up, to end the game
+	"""
+	pass
+
+class GameBackend(SinkBackend):
+	"""
+	The backend for a game played by play(). It times each frame and ends the game when the virtual clock reaches the time limit
+	"""
+	def __init__(self, keys, seconds):
+		SinkBackend.__init__(self)
+		for key in keys: self.press(key)
+		self.seconds = seconds
+		self.frame_costs = [] # the real time from each frame to the next, in seconds
+		self.previous = time.perf_counter() # when the last frame was shown
+
+	def check(self):
+		if self.clock >= self.seconds: raise Finished()
+
+	def present(self, rows, scrolled = 0):
+		self.check()
+		self.terminal.present(rows, scrolled)
+		self.frames_shown += 1
+		now = time.perf_counter()
+		self.frame_costs.append(now - self.previous) # the game's own work, drawing and encoding the frame. Sleeping takes no time on the virtual clock
+		self.previous = now
+
+	def poll_events(self):
+		self.check()
+		return SinkBackend.poll_events(self)
+
+	def next_event(self, timeout = 0):
+		self.check()
+		return SinkBackend.next_event(self, timeout)
+
+	def sleep(self, seconds):
+		self.check()
+		SinkBackend.sleep(self, seconds)
+
+def script(keys, every, seconds, generator, start = ()):
+	"""
+	return: a list of random (time, key) presses for a game
+
+	keys: the keys to choose from
+	every: the least and most seconds between presses
+	seconds: when to stop
+	generator: a random.Random to choose with
+	start: keys to press first, half a second apart. eg to get past a title screen
+	"""
+	presses = [(0.5*(i + 1), key) for i, key in enumerate(start)]
+	when = 0.5*(len(start) + 1)
+	while keys and when < seconds:
+		presses.append((when, generator.choice(keys)))
+		when += generator.uniform(*every)
+	return presses
+
+# The example games and the keys to play them with: (the file in examples/, the keys to choose from, the least and most seconds between presses, the keys to press first).
+# There is never an Enter, so a high score name is never finished and no scores file is changed, or an Esc, which would end the game
+ARROWS = [CSI + 'A', CSI + 'B', CSI + 'C', CSI + 'D'] # KEY_UP, KEY_DOWN, KEY_RIGHT and KEY_LEFT, without importing the keyboard module which sets up the console
+GAMES = [
+	('tetris', 'tetris.py', ARROWS + ['x', 'z'], (0.1, 0.5), ['x']),
+	('snake', 'snake.py', ARROWS, (0.3, 1.2), ['x']),
+	('flappy', 'flappy.py', [' '], (0.2, 0.7), [' ']),
+	('breakout', 'breakout.py', [' ', CSI + 'C', CSI + 'D'], (0.05, 0.3), ['x']),
+	('2048', '2048.py', ARROWS, (0.3, 1.0), ['x']),
+	('life', 'life.py', [], None, []), # it runs by itself until a key is pressed
+	('parallax_scroll', 'parallax_scroll.py', [], None, []),
+]
+
+def play(path, keys, seconds = 60.0, seed = 0):
+	"""
+	Plays a game headless with the given key presses and times its frames
+
+	path: the file name of the game's python program
+	keys: a list of (time, key) presses
+	seconds: how long to play for on the virtual clock
+	seed: for the random numbers of the game, so it plays out the same way every time
+	return: a dictionary of 'frames' shown, 'fps' (frames per real second), 'mean' (the same, so compare() works like for the microbenchmarks),
+	        'mean_cost' and 'p99_cost' (the real seconds per frame), 'bytes_per_frame' sent to the console and 'seconds' of game time
+	"""
+	game = GameBackend(keys, seconds)
+	previous = backend.use(game)
+	directory = os.getcwd()
+	arguments = sys.argv
+	state = random.getstate()
+	os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(path)))) # the examples load their files from paths like examples/data/
+	sys.argv = [path]
+	random.seed(seed)
+	start = time.perf_counter()
+	try:
+		runpy.run_path(path, run_name = "__main__")
+	except (Finished, SystemExit):
+		pass
+	finally:
+		elapsed = time.perf_counter() - start
+		backend.use(previous)
+		os.chdir(directory)
+		sys.argv = arguments
+		random.setstate(state)
+	costs = sorted(game.frame_costs)
+	frames = len(costs)
+	return {
+		'frames': frames,
+		'fps': frames/elapsed if elapsed else 0.0,
+		'mean': frames/elapsed if elapsed else 0.0,
+		'mean_cost': sum(costs)/frames if frames else 0.0,
+		'p99_cost': costs[int(0.99*(frames - 1))] if frames else 0.0,
+		'bytes_per_frame': game.terminal.bytes_written/frames if frames else 0.0,
+		'seconds': game.clock,
+	}
+
+def run_games(only = None, seconds = 60.0, seed = 0, examples = None, report = None):
+	"""
+	Plays the example games. See play()
+
+	only: a piece of text. Only the games with it in their name are played. None plays them all
+	examples: the directory of the example games. None for the examples/ next to the tinygame module
+	report: a function called with each game's name and result as it finishes, eg to print it. None for nothing
+	return: a dictionary of the results like run() returns
+	"""
+	if examples is None: examples = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+	results = {}
+	for name, filename, keys, every, start in GAMES:
+		if only is not None and only not in name: continue
+		generator = random.Random(seed)
+		results['game.' + name] = play(os.path.join(examples, filename), script(keys, every, seconds, generator, start), seconds, seed)
+		if report is not None: report('game.' + name, results['game.' + name])
+	return dict(environment(), results = results)
+
+def environment():
+	"""
+	return: a dictionary describing what the benchmarks ran on, to go with the results
+	"""
+	return {
+		'python': platform.python_version(),
+		'implementation': platform.python_implementation(),
+		'machine': platform.machine(),
+		'numpy': numpy.__version__ if numpy is not None else None,
+	}
+
+def measure(setup, repeats = 5, seconds = 0.2):
+	"""
+	Times one benchmark
+
+	setup: the benchmark's setup function. See BENCHMARKS
+	repeats: how many rounds to time
+	seconds: about how long each round takes
+	return: a dictionary of the operations per second: 'mean', 'stdev' (between the rounds), 'min', 'max', and 'repeats'
+	"""
+	operation, operations = setup()
+	previous = backend.use(getattr(operation, 'backend', backend.get()))
+	try:
+		calls = 1
+		while True: # work out how many calls fit in a round, which also warms up
+			start = time.perf_counter()
+			for i in range(0, calls): operation()
+			elapsed = time.perf_counter() - start
+			if elapsed >= seconds/10: break
+			calls *= 10
+		calls = max(1, int(calls*seconds/elapsed))
+		rates = []
+		for repeat in range(0, repeats):
+			start = time.perf_counter()
+			for i in range(0, calls): operation()
+			rates.append(calls*operations/(time.perf_counter() - start))
+	finally:
+		backend.use(previous)
+		if hasattr(operation, 'cleanup'): operation.cleanup()
+	return {
+		'mean': statistics.mean(rates),
+		'stdev': statistics.stdev(rates) if len(rates) > 1 else 0.0,
+		'min': min(rates),
+		'max': max(rates),
+		'repeats': repeats,
+	}
+
+def run(only = None, repeats = 5, seconds = 0.2, report = None):
+	"""
+	Runs the benchmarks
+
+	only: a piece of text. Only the benchmarks with it in their name are run. None runs them all
+	repeats, seconds: see measure()
+	report: a function called with each benchmark's name and result as it finishes, eg to print it. None for nothing
+	return: a dictionary of the results, ready to save as JSON. 'results' has each benchmark's result by name (see measure())
+	"""
+	results = {}
+	for name, setup in BENCHMARKS:
+		if only is not None and only not in name: continue
+		results[name] = measure(setup, repeats, seconds)
+		if report is not None: report(name, results[name])
+	return dict(environment(), results = results)
+
+def compare(results, baseline, threshold = 10.0):
+	"""
+	Compares results to a baseline
+
+	results, baseline: dictionaries from run()
+	threshold: how many percent slower a benchmark can be before it counts as a regression
+	return: a list of (name, new operations per second, baseline operations per second, percent change, regressed) for each benchmark in both
+	"""
+	comparison = []
+	for name, result in results['results'].items():
+		if name not in baseline['results']: continue # a new benchmark
+		old = baseline['results'][name]['mean']
+		change = 100.0*(result['mean'] - old)/old
+		comparison.append((name, result['mean'], old, change, change < -threshold))
+	return comparison
+
+def format_rate(rate):
+	"""
+	return: operations per second as short text. eg 1.23M
+	"""
+	for limit, suffix in ((1e9, 'G'), (1e6, 'M'), (1e3, 'k')):
+		if rate >= limit: return "%.2f%s" % (rate/limit, suffix)
+	return "%.1f" % rate
+
+def main(only = None, repeats = 5, seconds = 0.2, save = None, baseline = None, threshold = 10.0, games = False, game_seconds = 60.0, seed = 0):
+	"""
+	Runs the benchmarks and prints the results, for python -m tinygame bench
+
+	games: True to play the example games instead of the microbenchmarks. See run_games()
+	game_seconds, seed: see play()
+	save: the name of a JSON file to save the results to, or None
+	baseline: the name of a JSON file of results from before to compare to, or None
+	threshold: see compare()
+	return: True if no benchmark regressed
+	"""
+	old = None
+	if baseline is not None:
+		with open(baseline) as f:
+			old = json.load(f) # read first, so a missing baseline is found out before spending the time
+	if games:
+		print("%-34s %8s %12s %10s %10s %12s" % ('game', 'frames', 'frames/sec', 'mean ms', 'p99 ms', 'bytes/frame'))
+		def report(name, result):
+			print("%-34s %8d %12s %10.3f %10.3f %12.1f" % (name, result['frames'], format_rate(result['fps']), 1000*result['mean_cost'], 1000*result['p99_cost'], result['bytes_per_frame']))
+			sys.stdout.flush()
+		results = run_games(only, game_seconds, seed, report = report)
+	else:
+		print("%-34s %12s %10s" % ('benchmark', 'ops/sec', 'stdev'))
+		def report(name, result):
+			print("%-34s %12s %9.1f%%" % (name, format_rate(result['mean']), 100.0*result['stdev']/result['mean']))
+			sys.stdout.flush()
+		results = run(only, repeats, seconds, report)
+	if save is not None:
+		with open(save, 'w') as f:
+			json.dump(results, f, indent = 1)
+	if old is None: return True
+	print("\nCompared to %s (python %s):" % (baseline, old.get('python')))
+	regressed = False
+	for name, new, before, change, slower in compare(results, old, threshold):
+		print("%-34s %12s %12s %+8.1f%% %s" % (name, format_rate(new), format_rate(before), change, 'REGRESSION' if slower else ''))
+		regressed = regressed or slower
+	return not regressed
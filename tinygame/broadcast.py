@@ -0,0 +1,275 @@
+"""
+broadcast
+A submodule of tinygame for letting many people watch a game as it is played. eg for a tournament
+
+The game is broadcast on a Unix domain socket. Each watcher connects to it and sees the game on their own console, eg
+ python -m tinygame broadcast /tmp/game.sock examples/tetris.py	(the player)
+ python -m tinygame watch /tmp/game.sock	(each watcher)
+
+Each frame's changes are encoded only once (like for the console, see character_display.Terminal) and the same bytes are queued for every watcher,
+so the cost of encoding doesn't grow with the number of watchers. A background thread sends each watcher what is in their queue as fast as they take it.
+A watcher who falls too far behind has their queue thrown away and gets a keyframe (the whole frame) instead, and so does a watcher who has just joined
+"""
+
+import os
+import selectors
+import socket
+import sys
+import threading
+from collections import deque
+import tinygame.backend as backend
+from tinygame.character_display import Terminal, CLEAR_SEQUENCE, HIDE_CURSOR_SEQUENCE, SHOW_CURSOR_SEQUENCE, MOVE_HOME_SEQUENCE
+
+class BroadcastTerminal(Terminal):
+	"""
+	A Terminal (see character_display.py) which hands the encoded changes of each frame to a Broadcaster instead of writing them to the console
+	"""
+	def __init__(self, broadcaster):
+		Terminal.__init__(self)
+		self.broadcaster = broadcaster
+		self.newline = b'\r\n' # the watchers' consoles may not turn '\n' into a carriage return and line feed
+
+	def write(self, output):
+		self.broadcaster.publish(bytes(output)) # copied because self.buffer is used again for the next frame
+
+	def encoding(self):
+		return 'utf-8', 'replace'
+
+class Watcher():
+	"""
+	One watcher's connection and the frames queued for them
+	"""
+	def __init__(self, connection):
+		self.connection = connection
+		self.queue = deque() # encoded frames waiting to be sent. They are shared with the other watchers, never copied
+		self.sent = 0 # how much of the first frame in the queue has been sent already
+		self.resync = True # whether the watcher needs a keyframe before any more changes. True to start with
+
+class Broadcaster():
+	"""
+	A backend (see backend.py) which broadcasts every frame shown to the watchers connected to a Unix domain socket, and otherwise passes everything on to another backend, normally the console
+	"""
+	def __init__(self, path, wrapped = None, queue_size = 32):
+		"""
+		Starts broadcasting on a new Unix domain socket
+
+		path: the file name of the socket. It is replaced if it already exists
+		wrapped: the backend which actually shows the frames etc. The current one if None
+		queue_size: the most frames queued for a watcher. A watcher further behind than that gets a keyframe instead
+		"""
+		self.wrapped = wrapped if wrapped is not None else backend.get()
+		self.path = path
+		self.queue_size = queue_size
+		self.terminal = BroadcastTerminal(self) # encodes what changed each frame, just once for everybody
+		self.rows = None # the most recent frame, for new watchers and watchers who fell behind. None until there is one
+		self.keyframe = None # the most recent frame encoded as a keyframe. None until a watcher needs it
+		self.watchers = [] # the Watchers connected
+		self.lock = threading.Lock() # guards self.watchers, their queues, self.rows and self.keyframe, which are shared with the sending thread
+		self.frames_encoded = 0 # how many frames' changes were encoded
+		self.keyframes_encoded = 0 # how many keyframes were encoded
+		self.resyncs = 0 # how many times a watcher fell behind and was sent a keyframe instead
+		if os.path.exists(path): os.unlink(path)
+		self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.listener.bind(path)
+		self.listener.listen()
+		self.listener.setblocking(False)
+		self.wake_reader, self.wake_writer = socket.socketpair() # writing a byte to this wakes up the sending thread when there is something new to send
+		self.wake_reader.setblocking(False)
+		self.wake_writer.setblocking(False)
+		self.running = True
+		self.thread = threading.Thread(target = self.run_thread, name = "tinygame broadcast", daemon = True)
+		self.thread.start()
+
+	def initialize(self, render_thread = False):
+		self.wrapped.initialize(render_thread)
+
+	def quit(self):
+		self.wrapped.quit()
+		self.close()
+		if backend.current is self: backend.use(self.wrapped) # so frames and keys stop going through it once it has stopped broadcasting
+
+	def present(self, rows, scrolled = 0):
+		"""
+		Broadcasts the frame and then shows it with the wrapped backend
+		"""
+		if self.running:
+			with self.lock: # held until the changes are queued, so a watcher who joins in between can't get a keyframe of these rows and then the changes to them as well
+				self.rows = rows # the rows are never changed later so there is no need to copy them
+				self.keyframe = None # that one is out of date now
+				self.terminal.present(rows, scrolled) # encodes the changes once and gives them to publish()
+			self.wake()
+		self.wrapped.present(rows, scrolled)
+
+	def invalidate(self):
+		"""
+		Makes the next frame a full one for the watchers as well as for the wrapped backend
+		"""
+		self.terminal.invalidate()
+		self.wrapped.invalidate()
+
+	def poll_events(self):
+		return self.wrapped.poll_events()
+
+	def next_event(self, timeout = 0):
+		return self.wrapped.next_event(timeout)
+
+	def time(self):
+		return self.wrapped.time()
+
+	def sleep(self, seconds):
+		self.wrapped.sleep(seconds)
+
+	def publish(self, frame):
+		"""
+		Queues the encoded changes of a frame for every watcher. See BroadcastTerminal. self.lock must be held, see present()
+		"""
+		self.frames_encoded += 1
+		for watcher in self.watchers:
+			if not watcher.resync and len(watcher.queue) >= self.queue_size: # too far behind, so throw away what they haven't started getting
+				while len(watcher.queue) > (1 if watcher.sent else 0): watcher.queue.pop()
+				watcher.resync = True
+				self.resyncs += 1
+			if watcher.resync: # the changes are no good without the frame before, so send the whole frame
+				watcher.queue.append(self.current_keyframe())
+				watcher.resync = False
+			else:
+				watcher.queue.append(frame)
+
+	def current_keyframe(self):
+		"""
+		return: the most recent frame encoded as a keyframe, which draws the whole frame on a console. It is encoded at most once per frame. self.lock must be held
+		"""
+		if self.keyframe is None:
+			self.keyframe = (CLEAR_SEQUENCE + MOVE_HOME_SEQUENCE + HIDE_CURSOR_SEQUENCE + '\r\n'.join(self.rows)).encode('utf-8', 'replace')
+			self.keyframes_encoded += 1
+		return self.keyframe
+
+	def wake(self):
+		try:
+			self.wake_writer.send(b'.')
+		except BlockingIOError: # it's already been woken plenty
+			pass
+
+	def run_thread(self):
+		"""
+		The sending thread. It accepts new watchers and sends each watcher what is in their queue whenever their connection can take it
+		"""
+		selector = selectors.DefaultSelector()
+		selector.register(self.listener, selectors.EVENT_READ)
+		selector.register(self.wake_reader, selectors.EVENT_READ)
+		while self.running:
+			for key, events in selector.select():
+				if key.fileobj is self.listener:
+					self.accept(selector)
+				elif key.fileobj is self.wake_reader:
+					try:
+						while self.wake_reader.recv(4096): pass
+					except BlockingIOError:
+						pass
+				else:
+					watcher = key.data
+					if events & selectors.EVENT_READ: # watchers don't send anything, so this means they went away
+						try:
+							gone = not watcher.connection.recv(4096)
+						except BlockingIOError:
+							gone = False
+						except OSError:
+							gone = True
+						if gone:
+							self.remove(selector, watcher)
+							continue
+					if events & selectors.EVENT_WRITE: self.send(selector, watcher)
+			with self.lock: # watch for being able to send to the watchers who have something queued
+				for watcher in self.watchers:
+					events = selectors.EVENT_READ | (selectors.EVENT_WRITE if watcher.queue else 0)
+					if selector.get_key(watcher.connection).events != events:
+						selector.modify(watcher.connection, events, watcher)
+		selector.close()
+
+	def accept(self, selector):
+		try:
+			connection, address = self.listener.accept()
+		except BlockingIOError:
+			return
+		connection.setblocking(False)
+		watcher = Watcher(connection)
+		with self.lock:
+			if self.rows is not None: # the new watcher gets the current frame right away
+				watcher.queue.append(self.current_keyframe())
+				watcher.resync = False
+			self.watchers.append(watcher)
+		selector.register(connection, selectors.EVENT_READ, watcher)
+
+	def send(self, selector, watcher):
+		"""
+		Sends as much of a watcher's queue as their connection will take
+		"""
+		with self.lock:
+			try:
+				while watcher.queue:
+					frame = watcher.queue[0]
+					watcher.sent += watcher.connection.send(memoryview(frame)[watcher.sent:])
+					if watcher.sent < len(frame): return # their connection is full for now
+					watcher.queue.popleft()
+					watcher.sent = 0
+			except BlockingIOError:
+				return
+			except OSError: # they went away
+				pass
+			else:
+				return
+		self.remove(selector, watcher)
+
+	def remove(self, selector, watcher):
+		with self.lock:
+			self.watchers.remove(watcher)
+		selector.unregister(watcher.connection)
+		watcher.connection.close()
+
+	def close(self):
+		"""
+		Stops broadcasting. The watchers are disconnected and the socket file is removed
+		"""
+		if not self.running: return
+		self.running = False
+		self.wake()
+		self.thread.join()
+		for watcher in self.watchers:
+			watcher.connection.close()
+		self.watchers = []
+		self.listener.close()
+		self.wake_reader.close()
+		self.wake_writer.close()
+		if os.path.exists(self.path): os.unlink(self.path)
+
+def broadcast(path, **options):
+	"""
+	Starts broadcasting every frame shown to the watchers of a Unix domain socket. Call it before tinygame.initialize(). It stops when tinygame.quit() is called
+
+	path: the file name of the socket
+	options: passed on to Broadcaster. eg queue_size = 8
+	return: the Broadcaster
+	"""
+	broadcaster = Broadcaster(path, backend.get(), **options)
+	backend.use(broadcaster)
+	return broadcaster
+
+def watch(path):
+	"""
+	Shows a broadcast game on the console until it ends or the user presses Ctrl-C
+
+	path: the file name of the broadcast's socket
+	"""
+	connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	connection.connect(path)
+	try:
+		while True:
+			data = connection.recv(65536)
+			if not data: break
+			while data: # the console may take only part of it at a time
+				data = data[os.write(sys.stdout.fileno(), data):]
+	except KeyboardInterrupt:
+		pass
+	finally:
+		connection.close()
+		os.write(sys.stdout.fileno(), (CLEAR_SEQUENCE + MOVE_HOME_SEQUENCE + SHOW_CURSOR_SEQUENCE).encode())
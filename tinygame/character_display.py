@@ -5,9 +5,14 @@ You may manipulate it and change character cells. Typically as the your game tak
 You continually update the character map and show it once per time slice / frame of game time or whenever you want to show an update.
 """
 
+import io
 import os
+import select
 import sys
+import threading
+import time
 from tinygame.character_map import *
+from tinygame import backend # the frames may go somewhere other than the console, eg memory when running headless. See backend.py
 
 # This submodule makes use of ANSI control sequences to position characters on the terminal display
 # See http://en.wikipedia.org/wiki/ANSI_escape_code
@@ -17,17 +22,270 @@ ESCAPE = chr(27)
 CSI = ESCAPE + "[" # control sequences are started by writing a special sequence of characters to the terminal known as a Control Sequebce Introducer (CSI)
 HIDE_CURSOR_SEQUENCE = CSI + "?25l" # the control sequence which hides the console cursor
 SHOW_CURSOR_SEQUENCE = CSI + "?25h" # the control sequence which shows the console cursor
+CLEAR_SEQUENCE = CSI + "2J" # the control sequence which clears the whole console
 MOVE_HOME_SEQUENCE = CSI + "H" # the control sequence which moves the cursorback home to the top left corner of the console
+MOVE_TO_SEQUENCE = CSI + "%d;%dH" # the control sequence which moves the cursor to a row and column. Fill in the row and column counting from 1 eg MOVE_TO_SEQUENCE%(1, 1) is the top left
+SET_SCROLL_REGION_SEQUENCE = CSI + "%d;%dr" # the control sequence (DECSTBM) which limits scrolling to the rows from the first to the second, counting from 1. It also moves the cursor home
+RESET_SCROLL_REGION_SEQUENCE = CSI + "r" # the control sequence which makes the whole console the scroll region again
+SCROLL_UP_SEQUENCE = CSI + "%dS" # the control sequence which scrolls the scroll region up by a number of rows, blanking the rows exposed at the bottom
+SCROLL_DOWN_SEQUENCE = CSI + "%dT" # the control sequence which scrolls the scroll region down by a number of rows, blanking the rows exposed at the top
 
 
-def initialize():
+def initialize(render_thread = False):
+	"""
+	render_thread: if True, shown frames are written to the console by a background thread so a slow console doesn't hold up the game. See Terminal.start_thread()
+	"""
+	terminal.invalidate() # we no longer know what is on the console so the next show() draws everything
 	os.system("clear") # first clear the screen using the os command
 	sys.stdout.write(HIDE_CURSOR_SEQUENCE) # hide the cursor because it is annoying and would get in the way of a game's display screen. Uses ANSI escape sequences
+	if render_thread: terminal.start_thread()
 
 def quit():
+	terminal.stop_thread() # finish writing any frame still waiting, so nothing gets drawn after we clear the console
+	terminal.invalidate()
 	os.system("clear") # clear the console to put show a clean console to the user when we leave
 	sys.stdout.write(SHOW_CURSOR_SEQUENCE) # turn the user's cursor back on like they expect. Uses ANSI escape sequences
 
+class Terminal():
+	"""
+	A class representing the user's console as the CharacterDisplays see it.
+
+	It remembers the rows of text which are currently showing on the console (the front buffer).
+	When a display is shown, each row is compared to what is already there and only the characters which changed are sent,
+	each run of them after a control sequence moving the cursor to where the run starts. So a frame where only the snake's head moved costs a few bytes, not the whole screen.
+	There is only one console, so all the CharacterDisplays share the one Terminal in this module (see terminal below)
+
+	Normally present() writes to the console before returning, so when the console (or an SSH link) stalls the game stalls with it.
+	After start_thread() it instead hands the frame to a writer thread and returns immediately. If the console can't keep up, frames which were
+	never written are dropped in favour of the newest one. How that goes is counted in frames_written, frames_dropped and the write latencies (in seconds)
+	"""
+	def __init__(self):
+		self.front = [] # the rows of text currently on the console. Empty means we don't know, so everything must be drawn
+		self.buffer = bytearray(4096) # the encoded bytes of the frame being sent. It is reused every frame (and grown when a frame doesn't fit) so showing a frame doesn't create lots of garbage
+		self.moves = {} # the encoded cursor move sequences by (row, column) so we don't format the same ones every frame
+		self.newline = b'\n' # what to send to go to the start of the next row when drawing everything. The console turns '\n' into a carriage return and line feed itself
+		self.scroll_regions = True # whether the console supports scroll regions and the scroll sequences. Set it to False for one which doesn't and scrolled displays are simply redrawn where they changed
+		self.thread = None # the writer thread, if frames are written in the background. See start_thread()
+		self.pending = None # the newest frame waiting for the writer thread as (rows, scrolled, time it was presented), or None
+		self.condition = threading.Condition() # guards self.pending and wakes up the writer thread when there is a frame
+		self.writing = threading.Lock() # held while a frame is being written, so invalidate() can't happen in the middle of one. Always taken after self.condition, never before
+		self.frames_written = 0 # how many frames were written to the console
+		self.frames_dropped = 0 # how many frames were replaced by a newer one before the writer thread got to them
+		self.write_latency = 0.0 # the time from present() until the most recent frame was on the console
+		self.max_write_latency = 0.0 # the longest such time
+		self.total_write_latency = 0.0 # all of those times added up. Divide by frames_written for the average
+
+	def invalidate(self):
+		"""
+		Forgets what is on the console so the next frame is drawn in full. eg after the console is cleared
+
+		Any frame still waiting for the writer thread is dropped, as it would be drawn over whatever cleared the console
+		"""
+		with self.condition:
+			self.pending = None
+			with self.writing: # wait for a frame being written to finish, or it would put its rows back in self.front
+				self.front = []
+
+	def present(self, rows, scrolled = 0):
+		"""
+		Updates the console to show the given rows of text, sending only what changed since the last time
+
+		rows: a list of strings, one for each row of the display. They aren't changed later, so with a writer thread they can be handed over without copying
+		scrolled: how many rows the display was scrolled up since the console was last updated (negative if it was scrolled down). See encode()
+		"""
+		if self.thread is None:
+			with self.writing:
+				self.present_now(rows, scrolled, time.perf_counter())
+			return
+		with self.condition:
+			if self.pending is not None: # the writer thread hasn't got to the last frame yet, so the console skips it
+				self.frames_dropped += 1
+				scrolled += self.pending[1] # the console hasn't been scrolled for it either
+			self.pending = (rows, scrolled, time.perf_counter())
+			self.condition.notify()
+
+	def present_now(self, rows, scrolled, presented):
+		"""
+		Writes what changed to the console and counts how long it took. See present()
+
+		presented: the time.perf_counter() when present() was called
+		"""
+		output = self.encode(rows, scrolled)
+		if output:
+			self.write(output)
+		del output # let go of self.buffer so it can grow next time
+		self.front = list(rows) # the console now shows these rows. A frame with more or fewer rows clears the console first, see encode()
+		self.write_latency = time.perf_counter() - presented
+		self.max_write_latency = max(self.max_write_latency, self.write_latency)
+		self.total_write_latency += self.write_latency
+		self.frames_written += 1
+
+	def start_thread(self):
+		"""
+		Starts writing frames to the console with a background thread so present() doesn't wait for the console. See Terminal
+		"""
+		if self.thread is not None: return
+		self.thread = threading.Thread(target = self.run_thread, name = "tinygame render thread", daemon = True) # a daemon so it never keeps a crashed game from exiting
+		self.thread.start()
+
+	def stop_thread(self):
+		"""
+		Writes the frame still waiting, if any, and stops the background thread. present() writes to the console itself again
+		"""
+		thread = self.thread
+		if thread is None: return
+		with self.condition:
+			self.thread = None
+			self.condition.notify()
+		thread.join()
+
+	def run_thread(self):
+		"""
+		The writer thread. It waits for a frame from present() and writes it, until stop_thread()
+		"""
+		while True:
+			with self.condition:
+				while self.pending is None and self.thread is not None:
+					self.condition.wait()
+				if self.pending is None: return # stopped and nothing left to write
+				rows, scrolled, presented = self.pending
+				self.pending = None
+				self.writing.acquire() # before letting go of self.condition so invalidate() can't come in between
+			try:
+				self.present_now(rows, scrolled, presented)
+			finally:
+				self.writing.release()
+
+	def write(self, output):
+		"""
+		Sends encoded bytes to the console in one go, straight to the operating system rather than through sys.stdout's buffers
+
+		output: a bytes like object (eg a memoryview of self.buffer)
+		"""
+		sys.stdout.flush() # anything already written with sys.stdout.write() (eg by initialize()) must come out first
+		try:
+			fd = sys.stdout.fileno()
+		except (AttributeError, ValueError, io.UnsupportedOperation): # sys.stdout isn't a real file, eg it was replaced by an io.StringIO
+			sys.stdout.write(bytes(output).decode(*self.encoding()))
+			return
+		while output: # the OS may take only part of it if the console is busy, so keep going until it is all sent
+			try:
+				output = output[os.write(fd, output):]
+			except BlockingIOError: # the console is shared with the keyboard which is non-blocking (see keyboard.py), so wait until it can take more
+				select.select([], [fd], [])
+
+	def encode(self, rows, scrolled = 0):
+		"""
+		Encodes the characters and control sequences which turn what is on the console into the given rows
+
+		If the display was scrolled the console can move what it shows by itself, using a scroll region as tall as the display (so nothing below it moves).
+		Then only the rows which scrolled into view and anything else that changed need to be sent. That is done whenever it costs fewer bytes than sending the changes without scrolling.
+		A frame of a different size than the one on the console (eg from another display) clears the console and is drawn in full, so nothing of the old one is left around it
+		rows: a list of strings, one for each row of the display
+		scrolled: how many rows the display was scrolled up since the console was last updated (negative if it was scrolled down). 0 if it wasn't or isn't known
+		return: a memoryview of the part of self.buffer holding the encoded bytes. It is empty if nothing changed
+		"""
+		encoding, errors = self.encoding()
+		length = 0
+		if self.front and (len(rows) != len(self.front) or any(len(row) != len(old) for row, old in zip(rows, self.front))): # a different size of frame
+			length = self.put(length, CLEAR_SEQUENCE.encode()) # clear away the parts of the old frame the new one doesn't cover
+			self.front = [] # and draw it in full below
+		if not self.front: # we don't know what is on the console
+			length = self.put(length, MOVE_HOME_SEQUENCE.encode()) # so start off at the top left and draw everything
+			for y in range(0, len(rows)):
+				if y: length = self.put(length, self.newline)
+				length = self.put(length, rows[y].encode(encoding, errors))
+			return memoryview(self.buffer)[0:length]
+		if scrolled and self.scroll_regions and abs(scrolled) < len(rows):
+			# encode the scrolled way first and then the plain way after it in the buffer, and keep whichever is shorter
+			scroll = SCROLL_UP_SEQUENCE%scrolled if scrolled > 0 else SCROLL_DOWN_SEQUENCE%-scrolled
+			length = self.put(length, (SET_SCROLL_REGION_SEQUENCE%(1, len(rows)) + scroll + RESET_SCROLL_REGION_SEQUENCE).encode())
+			length = self.encode_changes(rows, self.scrolled_front(rows, scrolled), length, encoding, errors)
+		end = self.encode_changes(rows, self.front, length, encoding, errors)
+		if length and length <= end - length: return memoryview(self.buffer)[0:length] # scrolling is cheaper
+		return memoryview(self.buffer)[length:end]
+
+	def encode_changes(self, rows, front, length, encoding, errors):
+		"""
+		Encodes the characters and control sequences which turn the rows front into the given rows, into self.buffer after the first length bytes
+
+		return: the new length of the data in the buffer
+		"""
+		for y in range(0, len(rows)):
+			row = rows[y]
+			old = front[y] if y < len(front) else '' # a row we have never drawn counts as completely changed
+			if row == old: continue # most rows don't change from one frame to the next
+			runs = changed_runs(old, row)
+			if not runs: continue # eg the row is only shorter, which changed_runs() doesn't count
+			start, end = runs[0]
+			for next_start, next_end in runs[1:]:
+				if next_start - end > len(self.move(y, next_start)): # it is cheaper to move the cursor past the unchanged characters
+					length = self.put(length, self.move(y, start))
+					length = self.put(length, row[start:end].encode(encoding, errors))
+					start = next_start
+				end = next_end # otherwise merge the runs and simply rewrite the unchanged characters between them
+			length = self.put(length, self.move(y, start))
+			length = self.put(length, row[start:end].encode(encoding, errors))
+		return length
+
+	def scrolled_front(self, rows, scrolled):
+		"""
+		Works out what the console shows after its top len(rows) rows are scrolled up by scrolled rows (down if negative)
+
+		return: a list of strings, one for each row. The rows scrolled into view are blank because that is how the console fills them
+		"""
+		front = self.front[0:len(rows)] + [''] * (len(rows) - len(self.front)) # rows never drawn are unknown, same as in encode_changes()
+		if scrolled > 0:
+			return front[scrolled:] + [' ' * len(row) for row in rows[len(rows) - scrolled:]]
+		return [' ' * len(row) for row in rows[0:-scrolled]] + front[0:len(rows) + scrolled]
+
+	def encoding(self):
+		"""
+		return: the (encoding, errors) pair sys.stdout uses, so the bytes we send are exactly what writing the text to sys.stdout would send
+		"""
+		return getattr(sys.stdout, 'encoding', None) or 'utf-8', getattr(sys.stdout, 'errors', None) or 'strict'
+
+	def move(self, y, x):
+		"""
+		return: the encoded control sequence moving the cursor to column x of row y (counting from 0)
+		"""
+		move = self.moves.get((y, x))
+		if move is None:
+			move = self.moves[(y, x)] = (MOVE_TO_SEQUENCE%(y + 1, x + 1)).encode()
+		return move
+
+	def put(self, length, data):
+		"""
+		Copies bytes into self.buffer after the first length bytes, growing it if they don't fit
+
+		return: the new length of the data in the buffer
+		"""
+		end = length + len(data)
+		if end > len(self.buffer):
+			self.buffer.extend(bytes(max(end, 2*len(self.buffer)) - len(self.buffer))) # at least double it so growing happens rarely
+		self.buffer[length:end] = data # same size so this copies in place
+		return end
+
+def changed_runs(old, new):
+	"""
+	Finds the runs of characters in the string new which are different from the string old at the same position
+
+	return: a list of (start, end) pairs. Each run of changed characters is new[start:end]
+	"""
+	runs = []
+	start = None # the start of the current run. None when we are not in a run
+	for i in range(0, len(new)):
+		if i < len(old) and old[i] == new[i]: # unchanged
+			if start is not None:
+				runs.append((start, i))
+				start = None
+		elif start is None:
+			start = i
+	if start is not None: runs.append((start, len(new)))
+	return runs
+
+terminal = Terminal() # the one console shared by all the CharacterDisplays
+
 class CharacterDisplay(CharacterMap): # Inherit from the CharacterMap class.
 	"""
 	A class representing a virtual video game display consisting of only characters (it extends the CharacterMap class)
@@ -46,70 +304,96 @@ class CharacterDisplay(CharacterMap): # Inherit from the CharacterMap class.
 		height: a positive integer representing the desired height of the display
 		"""
 		CharacterMap.__init__(self, width, height)
-		self.dirty = True # use a dirty bit to track if the user's console view is up to date. That way we only refresh if necessary
+		# Instead of one dirty bit for the whole screen we track which rows are dirty. That way show() only has to convert the rows which were drawn on since last time
+		# The rows are tracked by where they are stored in self.data rather than where they appear, so scrolling up and down does not make any row dirty. See CharacterMap
+		self.row_text = ['' for i in range(0, self.height)] # the text of each stored row as of the last show(). Clean rows reuse it
+		self.dirty_rows = set(range(0, self.height)) # the stored rows drawn on since the last show(). All of them to start
+		self.shown_origin = None # the origin (see CharacterMap) as of the last show(). None if never shown
+		self.scrolled = 0 # how many rows the display was scrolled up since the last show() (negative for down) so the console can scroll too. See Terminal.encode()
 
 	def show(self):
 		"""
 		Updates the user's console with the current state of the screen
 
-		You should do this exactly once per time slice. There is no cost to calling this many times if there is no change in the display as the dirty bit tracks if it needs to actually be pushed on screen.
+		You should do this exactly once per time slice. There is no cost to calling this many times if there is no change in the display as the dirty rows track if it needs to actually be pushed on screen.
 		WARNING! If you change and show the screen too oftern flickering may result. Only .show() when you finalize how the screen should look.
 		"""
-		if self.dirty: # use a dirty bit to track if the user's console view is up to date. That way we only refresh if necessary
-			sys.stdout.write(MOVE_HOME_SEQUENCE) # start off at the top left and draw everything. Uses ANSI escape sequences
-			# We want to convert the character map into a single string for easy printing
-			sys.stdout.write(str(self)) #simply print a string version of the whole characte map with newline characters for each row etc. See CharacterMap.__str__() in character_map.py
-			sys.stdout.flush() # flush the output so it is shown by the OS immediately instead of waiting for enough data
-			self.dirty = False # We have just updated the console so obviously the screen is not dirty
+		origin = (self.origin_x, self.origin_y)
+		if not self.dirty_rows and origin == self.shown_origin: return # nothing was drawn or scrolled since last time so the console is up to date
+		for y in self.dirty_rows: # convert only the dirty rows to text
+			self.row_text[y] = self.data[y*self.width:(y + 1)*self.width].tounicode()
+		self.dirty_rows.clear()
+		rows = self.row_text[self.origin_y:] + self.row_text[0:self.origin_y] # put the rows in the order they appear starting from the top row
+		if self.origin_x: rows = [row[self.origin_x:] + row[0:self.origin_x] for row in rows] # and the columns too when it has been scrolled sideways
+		backend.get().present(rows, self.scrolled) # send the rows to the console. Only the characters which differ from what it already shows are actually sent. See Terminal (and backend.py for other places they can go)
+		self.shown_origin = origin
+		self.scrolled = 0
 
-	def __setitem__(self, x_y, value):
+	def force_full_redraw(self):
 		"""
-		Same as setting a value in a normal character map. See CharacterMap
+		Makes the next show() draw the whole display instead of just the changes
+
+		Use this if something else may have written on the console, eg a message printed by another program
 		"""
-		x, y = x_y
-		if self[x,y] != value:
-			CharacterMap.__setitem__(self, (x, y), value)
-			self.dirty = True # same except we now know the screen data is now different so set the dirty bit
+		backend.get().invalidate() # the terminal which actually draws this display, eg a telnet player's rather than the console
+		self.dirty = True
 
-	def fill(self, character):
+	@property
+	def dirty(self):
 		"""
-		Same as filling a normal character map. See CharacterMap
+		True if the display has changed since the last show()
 		"""
-		CharacterMap.fill(self, character)
-		self.dirty = True # same except we now know the screen data is now different so set the dirty bit
+		return bool(self.dirty_rows) or (self.origin_x, self.origin_y) != self.shown_origin
+
+	@dirty.setter
+	def dirty(self, value):
+		if value:
+			self.dirty_rows.update(range(0, self.height)) # mark every row as dirty
+		else:
+			self.dirty_rows.clear()
+			self.shown_origin = (self.origin_x, self.origin_y)
+			self.scrolled = 0
+
+	def __setitem__(self, x_y, value):
+		"""
+		Same as setting a value in a normal character map. See CharacterMap
+		"""
+		x, y = x_y
+		if 0 <= y < self.height:
+			CharacterMap.__setitem__(self, x_y, value)
+			self.dirty_rows.add((y + self.origin_y) % self.height) # same except we now know the row is dirty. Simply marking it is cheaper than checking if the value actually changed
 
 	def scroll_up(self, amount = 1):
 		"""
-		Same as scrolling a normal character map. See CharacterMap
+		Same as scrolling a normal character map up. See CharacterMap
 		"""
 		CharacterMap.scroll_up(self, amount)
-		self.dirty = True # same except we now know the screen data is now different so set the dirty bit
+		self.scrolled += amount # same except we remember it so the console can be scrolled the same way when shown
 
 	def scroll_down(self, amount = 1):
 		"""
-		Same as scrolling down on a normal character map. See CharacterMap
+		Same as scrolling a normal character map down. See CharacterMap
 		"""
 		CharacterMap.scroll_down(self, amount)
-		self.dirty = True # same except we now know the screen data is now different so set the dirty bit
+		self.scrolled -= amount # same except we remember it so the console can be scrolled the same way when shown
 
-	def scroll_left(self, amount = 1):
+	def fill(self, character):
 		"""
-		Same as scrolling a normal character map. See CharacterMap
+		Same as filling a normal character map. See CharacterMap
 		"""
-		CharacterMap.scroll_left(self, amount)
-		self.dirty = True # same except we now know the screen data is now different so set the dirty bit
+		CharacterMap.fill(self, character)
+		self.dirty = True # same except we now know every row is dirty
 
-	def draw_image(self, x, y, character_map, chromakey = None):
+	def restore(self, snapshot):
 		"""
-		Same as drawing onto a a normal character map. See CharacterMap
+		Same as restoring a normal character map. See CharacterMap
 		"""
-		CharacterMap.draw_image(self, x, y, character_map, chromakey)
-		self.dirty = True # same except we now know the screen data is now different so set the dirty bit
+		CharacterMap.restore(self, snapshot)
+		if snapshot.source is self: self.dirty_rows.update(snapshot.saved) # same except we now know the rows copied back are dirty. Drawing a snapshot of another map marks its own rows
 
-	def write_text(self, x, y, text):
+	def _set_run(self, x, y, run):
 		"""
-		Same as write_text on a normal character map. See CharacterMap
+		Same as CharacterMap._set_run(). Everything that draws more than one character (draw_image(), write_text() and views of the display) draws through this, so this is where those rows are marked dirty
 		"""
-		CharacterMap.write_text(self, x, y, text)
-		self.dirty = True # same except we now know the screen data is now different so set the dirty bit
-
+		CharacterMap._set_run(self, x, y, run)
+		self.dirty_rows.add((y + self.origin_y) % self.height) # same except we now know the row is dirty
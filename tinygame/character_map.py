@@ -5,13 +5,39 @@ A character map is a mutable rectangular array of characters akin to a bitmap. B
 text and shapes onto character maps and can draw one character map onto another
 """
 
+import weakref
+from array import array, typecodes # the array module stores many values of one simple type packed together in one block of memory
+from collections import deque
+
+# Every cell of every CharacterMap is stored packed in a single array of unicode characters instead of a separate string object per cell.
+# Newer versions of python call the unicode character type 'w'. Older ones only know it as 'u'
+TYPECODE = 'w' if 'w' in typecodes else 'u'
+
+try:
+	import numpy # numpy is optional. If it is installed NumpyCharacterMap can composite whole blocks of characters at once. See NumpyCharacterMap
+except ImportError:
+	numpy = None
+
+CODE_DTYPE = '<u4' # NumpyCharacterMap stores each character as its unicode code point in a 32 bit unsigned integer. Little endian so it converts to and from 'utf-32-le' text directly
+
 class CharacterMap():
 	"""
 	A class representing a rectangular array of characters akin to a bitmap.
 
 	It provides various drawing and manupulation fuhctions to render text and shapes onto character maps 
 	and can copy one character map onto another
+
+	The characters are stored in one flat array (self.data) row after row.
+	Scrolling never moves the characters. Instead the map remembers which stored row and column currently appear at the top left (self.origin_x, self.origin_y)
+	and everything wraps around from there, like a ring. So the character at column x of row y is found at offset ((y + origin_y) % height)*width + (x + origin_x) % width
+	Whole pieces of a row are read and written at once as slices of that array. See _get_run() and _set_run()
+
+	A snapshot (see snapshot()) shares the stored rows with the map instead of copying them. The rows which a snapshot still shares are in self.shared_rows
+	and the first time one of them is written the old characters of that row are copied into the snapshots (see _unshare()) so they never see the change
 	"""
+	shared_rows = frozenset() # the stored rows which snapshots still share. Empty (so writing costs nothing extra) until the first snapshot()
+	snapshots = {} # the snapshots which may still share rows, by their id(). See snapshot()
+
 	def __init__(self, width, height):
 		"""
 		Constructor for the CharacterMap. The width and height must be specified. 
@@ -23,7 +49,8 @@ class CharacterMap():
 		"""
 		self.width = width
 		self.height = height
-		self.rows = [CharacterRow(self.width) for i in range(0, self.height)] # The data is constructed as a series of rows. See CharacterRow inner class below
+		self.data = array(TYPECODE, ' ' * (self.width * self.height)) # The data is constructed as one flat array holding all the rows one after the other
+		self.origin_x, self.origin_y = 0, 0 # the stored column and row which appear at the top left. Scrolling just moves them
 
 	def fill(self, character):
 		"""
@@ -31,8 +58,9 @@ class CharacterMap():
 
 		character: a single character string representing the derired character to fill the map. eg 'x'
 		"""
-		for row in self.rows:
-			row.fill(character) # do the filling work row wise. See CharacterRow.fill()
+		if self.shared_rows: self._unshare_all()
+		self.data[:] = array(TYPECODE, [character]) * len(self.data) # overwrite the whole array in place with one long run of the character
+		self.origin_x, self.origin_y = 0, 0 # every cell is the same now so we are free to start the rows and columns back at the beginning
 
 	def write_text(self, x, y, text):
 		"""
@@ -44,10 +72,37 @@ class CharacterMap():
 		y: an integer representing the top position to start the text message
 		text: a string the message to write into the map. It could be multiple lines. eg 'Hello,\nWorld!'
 		"""
-		lines = text.split('\n') # first split the text by the newline character into multiple lines
-		for i in range(0, len(lines)): # go throught each line
-			for j in range(0, len(lines[i])): # write all the characters in the line in the appropriate row, and column
-				self[x + j, y + i] = lines[i][j] if lines[i][j] not in ['\t'] else ' ' # draw only printable characters
+		lines = text.replace('\t', ' ').split('\n') # first draw tabs as blanks (only printable characters) and split the text by the newline character into multiple lines
+		for i in range(max(0, -y), min(len(lines), self.height - y)): # go throught each line which lands on a row of the map
+			line = lines[i]
+			x0 = max(0, x) # clip the line on the left
+			x1 = min(self.width, x + len(line)) # and on the right
+			if x0 < x1: self._set_run(x0, y + i, array(TYPECODE, line[x0 - x:x1 - x])) # write all the characters left in the line into the row in one go
+
+	def write_text_aligned(self, x, y, width, text, align = 'left'):
+		"""
+		Writes the given text aligned to the left, center, or right of a box of the given width
+
+		Each line of the text is aligned on its own, so you don't need to calculate the position of a title by hand eg
+
+		screen.write_text_aligned(0, 0, screen.width, "Game Over!", 'center')
+
+		Lines longer than the width are cut to the width first. Otherwise it is the same as write_text() (see above)
+
+		x: an integer representing the left position of the box
+		y: an integer representing the top position to start the text message
+		width: a positive integer representing the width of the box
+		text: a string the message to write into the map. It could be multiple lines. eg 'Hello,\nWorld!'
+		align: one of the strings 'left', 'center', or 'right'
+		"""
+		if align not in ['left', 'center', 'right']: raise ValueError("align must be 'left', 'center', or 'right' not %r"%(align,))
+		lines = text.split('\n')
+		for i in range(0, len(lines)):
+			line = lines[i][0:width] # cut the line to the box
+			if align == 'left': offset = 0
+			elif align == 'center': offset = (width - len(line))//2 # half the room left over goes on each side
+			else: offset = width - len(line) # all the room left over goes on the left
+			self.write_text(x + offset, y + i, line)
 
 	def draw_image(self, x, y, character_map, chromakey = None):
 		"""
@@ -59,18 +114,21 @@ class CharacterMap():
 
 		x: an integer representing the x coordinate where the top left character of other appears
 		y: an integer representing the y coordinate where the top left character of other appears
-		character_map: a CharacterMap to be composited onto this CharacterMap
+		character_map: a CharacterMap to be composited onto this CharacterMap. It may also be a precompiled Sprite (see CharacterMap.compile()) in which case its own chromakey is used
 		chromakey: a single character string representing the transparent characters in other. Typically None or ' '
 		"""
+		if isinstance(character_map, Sprite): return character_map.draw(self, x, y) # sprites know where their see through gaps are already. See Sprite.draw()
 		x0 = max(0, x) # start drawing at column x but clip it to 0 if we are drawing starting off the screen
 		y0 = max(0, y) # start drawing at row y but clip it to 0 if we are drawing starting off the screen
 		x1 = min(self.width, x + character_map.width) # clip right
 		y1 = min(self.height, y + character_map.height) # clip the bottom
+		if x0 >= x1: return # nothing is left to draw once it is clipped
 		ck = chromakey # It is allowed to be None
-		for yi in range(y0, y1): # go through the clipped rows and columns and draw
-			for xi in range(x0, x1):
-				c = character_map.rows[yi-y].characters[xi-x] # we get the character to draw from other at the correct offset
-				if c != ck: self.rows[yi].characters[xi] = c # place the character on self unless it matches the chromakey character "colour"
+		for yi in range(y0, y1): # go through the clipped rows and copy a whole clipped row at a time
+			run = character_map._get_run(x0-x, x1-x, yi-y) # we get the characters to draw from other at the correct offset
+			if ck is not None and ck in run: # only rows which actually contain the chromakey character need to be composited cell by cell
+				run = array(TYPECODE, [c if c != ck else d for c, d in zip(run, self._get_run(x0, x1, yi))]) # keep the original self data wherever the chromakey character "colour" is
+			self._set_run(x0, yi, run) # place the row of characters on self
 
 	def clone(self):
 		"""
@@ -82,6 +140,78 @@ class CharacterMap():
 		cmap.draw_image(0, 0, self) # simply draw yourself on the new map
 		return cmap
 
+	def snapshot(self):
+		"""
+		Takes a snapshot of this CharacterMap as it is now. The snapshot never changes, whatever is drawn on this map afterwards.
+
+		Unlike clone() nothing is copied up front. The snapshot shares the rows with this map and a row is only copied the first time this map writes to it after the snapshot,
+		so a snapshot costs memory for the rows changed since rather than for the whole map. Comparing a snapshot with this map (or another snapshot of it) only compares those rows. eg
+
+		before = grid.snapshot()
+		slide(grid)
+		if grid != before: insert_random(grid) # only the rows slide() wrote to are compared
+
+		return: a CharacterMapSnapshot. It can be drawn, compared and read like any CharacterMap but not changed. See restore() and history() to put this map back the way it was
+		"""
+		snapshot = CharacterMapSnapshot(self)
+		if not self.shared_rows: self.snapshots = weakref.WeakValueDictionary() # the earlier snapshots have copies of all their rows already so they needn't be kept track of any more
+		self.snapshots[id(snapshot)] = snapshot # weak so a snapshot which is thrown away stops costing anything. By id since maps compare by their characters
+		self.shared_rows = set(range(0, self.height)) # the new snapshot shares every row
+		return snapshot
+
+	def restore(self, snapshot):
+		"""
+		Makes this CharacterMap the same as a snapshot taken of it earlier. See snapshot()
+
+		Only the rows changed since the snapshot are copied back, and the scrolling is put back too.
+		A snapshot of some other map is simply drawn on this one instead
+
+		snapshot: a CharacterMapSnapshot, usually from this map's snapshot()
+		"""
+		if snapshot.source is not self: return self.draw_image(0, 0, snapshot)
+		for row, run in list(snapshot.saved.items()): # the rows which this map has written to since. The rest are still the same
+			if self.shared_rows: self._unshare(row) # newer snapshots may still share the row
+			self.data[row*self.width:(row + 1)*self.width] = run
+		self.origin_x, self.origin_y = snapshot.origin_x, snapshot.origin_y
+
+	def history(self, size = 100):
+		"""
+		Creates an undo and redo history of this CharacterMap holding up to size snapshots. See History
+
+		size: a positive integer, the most steps which can be undone. The oldest are forgotten first
+		return: a History. eg call history.save() before each move and history.undo() to take it back
+		"""
+		return History(self, size)
+
+	def view(self, x, y, width, height):
+		"""
+		Creates a view of a rectangle of this CharacterMap. The view is a CharacterMap of its own but it shares the characters with this map instead of copying them.
+
+		Anything drawn on the view is drawn on this map and anything drawn on this map inside the rectangle shows up in the view.
+		The view has its own coordinates starting at 0, 0 in its top left and is clipped to its own width and height. eg keep the score panel of a game as a view of the screen
+		The rectangle is clipped to this map.
+
+		x: an integer representing the left column of the rectangle in this map
+		y: an integer representing the top row of the rectangle in this map
+		width: a positive integer representing the width of the rectangle
+		height: a positive integer representing the height of the rectangle
+		return: a CharacterMapView of the rectangle. See CharacterMapView
+		"""
+		return CharacterMapView(self, x, y, width, height)
+
+	def compile(self, chromakey = ' '):
+		"""
+		Precompiles this CharacterMap into a Sprite to be drawn over and over with the given chromakey. See Sprite
+
+		Drawing a Sprite with draw_image() gives the same result as drawing this map with the chromakey, only faster,
+		since the transparent cells are found once here instead of every time it is drawn.
+		The Sprite is a copy. Changing this map afterwards does not change the Sprite
+
+		chromakey: a single character string representing the transparent characters. Typically ' '
+		return: a Sprite. eg screen.draw_image(x, y, mymap.compile(' '))
+		"""
+		return Sprite(self, chromakey)
+
 	def scroll_up(self, amount = 1):
 		"""
 		Rolls the rows of this chacter map up amount rows by changing the offset of the "top" row
@@ -90,10 +220,7 @@ class CharacterMap():
 
 		amount: a positive integer less than self.height specifying how many rows to scroll off the top
 		"""
-		amount = amount % self.height
-		temp = self.rows
-		self.rows = temp[amount:]
-		self.rows.extend(temp[0:amount])
+		self.origin_y = (self.origin_y + amount) % self.height # the row which was amount rows down is now the top row. Nothing needs to be copied
 
 	def scroll_down(self, amount = 1):
 		"""
@@ -103,36 +230,25 @@ class CharacterMap():
 
 		amount: a positive integer less than self.height specifying how many rows to scroll off the top
 		"""
-		amount = amount % self.height
-		temp = self.rows
-		self.rows = temp[self.height-amount:]
-		self.rows.extend(temp[0:self.height - amount])
+		self.origin_y = (self.origin_y - amount) % self.height # the row which was amount rows up is now the top row. Nothing needs to be copied
 
 	def scroll_left(self, amount = 1):
 		"""
 		Rolls the colums of this chacter map left amount columns. 
-		
+
 		The columns which were "scrolled off" the left roll around and appear on the right.
 		amount: a positive integer less than self.width specifying how many rows to scroll off the left
 		"""
-		amount = amount % self.width
-		for row in self.rows:
-			temp = row.characters
-			row.characters = temp[amount:]
-			row.characters.extend(temp[0:amount])
+		self.origin_x = (self.origin_x + amount) % self.width # the column which was amount columns right is now the leftmost column. Nothing needs to be copied
 
 	def scroll_right(self, amount = 1):
 		"""
 		Rolls the colums of this chacter map right amount columns. 
-		
+
 		The columns which were "scrolled off" the right roll around and appear on the left.
 		amount: a positive integer less than self.width specifying how many rows to scroll off the right
 		"""
-		amount = amount % self.width
-		for row in self.rows:
-			temp = row.characters
-			row.characters = temp[self.width-amount:]
-			row.characters.extend(temp[0:self.width - amount])
+		self.origin_x = (self.origin_x - amount) % self.width # the column which was amount columns left is now the leftmost column. Nothing needs to be copied
 
 	def __setitem__(self, x_y, value):
 		"""
@@ -146,10 +262,9 @@ class CharacterMap():
 		value: a single character string representing the desired value to set. eg '*'
 		"""
 		x, y = x_y
-		try: # simply try and draw and catch exceptions so nothing happens if we try to draw off the map
-			self.rows[y][x] = value # this in turn calls the setter in CharacterRow class. See CharacterRow.__setitem__
-		except IndexError as e:
-			pass # we just ignore when a character is drawn completely out of bounds
+		if 0 <= x < self.width and 0 <= y < self.height: # nothing happens if we try to draw off the map
+			if self.shared_rows: self._unshare((y + self.origin_y) % self.height) # a snapshot still shares the row. See snapshot()
+			self.data[(y + self.origin_y) % self.height * self.width + (x + self.origin_x) % self.width] = value # find the cell in the flat array (wrapping around from the origin) and set it
 
 	def __getitem__(self, x_y):
 		"""
@@ -163,10 +278,9 @@ class CharacterMap():
 		return: a single character string representing the value in the character map. eg '*'
 		"""
 		x, y = x_y
-		try:
-			return self.rows[y][x] # this in turn calls the getter in CharacterRow class. See CharacterRow.__getitem__
-		except IndexError as e:
-			return None # return None when character is completely out of bounds
+		if 0 <= x < self.width and 0 <= y < self.height:
+			return self.data[(y + self.origin_y) % self.height * self.width + (x + self.origin_x) % self.width] # find the cell in the flat array (wrapping around from the origin)
+		return None # return None when character is completely out of bounds
 
 	def __str__(self):
 		"""
@@ -178,14 +292,19 @@ class CharacterMap():
 
 		return: a string representation of this map
 		"""
-		return '\n'.join([str(row) for row in self.rows]) # the new line puts each row of characters on a new line. In turn the __str__ overload is called on each row. See CharacterRow.__str__()
+		s = self.data.tounicode() # convert the whole array to one string in a single step
+		rows = [s[y*self.width:(y + 1)*self.width] for y in range(0, self.height)] # the rows as they are stored
+		if self.origin_y: rows = rows[self.origin_y:] + rows[0:self.origin_y] # start from the top row when the map has been scrolled
+		if self.origin_x: rows = [row[self.origin_x:] + row[0:self.origin_x] for row in rows] # same for the leftmost column
+		return '\n'.join(rows) # the new line puts each row of characters on a new line
 
 	def __eq__(self, other):
 		"""
 		Compares the content of two character maps to see if they are identical
 		"""
+		if isinstance(other, CharacterMapSnapshot) and not isinstance(self, CharacterMapSnapshot): return other.__eq__(self) # it knows which rows are still shared and needn't be compared
 		if (self.width, self.height) != (other.width, other.height): return False # must be the same dimensions
-		return all([r == s for r,s in zip(self.rows, other.rows)]) # check content row by row
+		return all([self._get_run(0, self.width, y) == other._get_run(0, other.width, y) for y in range(0, self.height)]) # check content row by row
 
 	def __ne__(self, other):
 		"""
@@ -193,25 +312,510 @@ class CharacterMap():
 		"""
 		return not self.__eq__(other)
 
-class CharacterRow():
+	def _get_run(self, x0, x1, y):
+		"""
+		Reads the characters from column x0 up to (but not including) column x1 of row y in a single step.
+
+		The columns must already be clipped to the map. This is the fast path used for copying between maps
+		When the map has been scrolled sideways the run may wrap around the end of the stored row, in which case it is read in two pieces
+
+		return: an array of the characters
+		"""
+		if not self.width: return array(TYPECODE) # a map with no columns has nothing to read, and no columns to wrap around
+		o = (y + self.origin_y) % self.height * self.width # the offset where row y is stored
+		a = o + (x0 + self.origin_x) % self.width # the offset of the first cell
+		b = a + x1 - x0 # the offset just past the last cell
+		if b <= o + self.width: return self.data[a:b] # it is all in one piece
+		return self.data[a:o + self.width] + self.data[o:b - self.width] # the end of the stored row then its beginning
+
+	def _set_run(self, x, y, run):
+		"""
+		Writes an array of characters into row y starting at column x in a single step.
+
+		The run must already be clipped to the map. This is the fast path used for copying between maps
+		When the map has been scrolled sideways the run may wrap around the end of the stored row, in which case it is written in two pieces
+		"""
+		row = (y + self.origin_y) % self.height # where row y is stored
+		if self.shared_rows: self._unshare(row) # a snapshot still shares the row. See snapshot()
+		o = row*self.width # the offset where row y is stored
+		a = o + (x + self.origin_x) % self.width # the offset of the first cell
+		b = a + len(run) # the offset just past the last cell
+		if b <= o + self.width:
+			self.data[a:b] = run # it is all in one piece
+		else:
+			n = o + self.width - a # the number of cells which fit before the end of the stored row
+			self.data[a:o + self.width] = run[0:n]
+			self.data[o:b - self.width] = run[n:] # the rest wraps around to the beginning
+
+	def _unshare(self, row):
+		"""
+		Copies stored row row into every snapshot which still shares it, before it is written to. See snapshot()
+
+		The snapshots all get the same copy. None of them ever change it
+		"""
+		if row not in self.shared_rows: return # already copied since the last snapshot
+		if not self.snapshots: # the snapshots were all thrown away
+			self.shared_rows = frozenset()
+			return
+		run = self.data[row*self.width:(row + 1)*self.width]
+		for snapshot in self.snapshots.values(): snapshot.saved.setdefault(row, run) # a snapshot which has the row already got it from an earlier write, before this one was taken
+		self.shared_rows.discard(row)
+		if not self.shared_rows: self.snapshots = {} # every snapshot has all the rows it needs now
+
+	def _unshare_all(self):
+		"""
+		Same as _unshare() for every row. eg before fill()
+		"""
+		for row in list(self.shared_rows): self._unshare(row)
+
+class CharacterMapSnapshot(CharacterMap):
 	"""
-	A class representing one row of character data.
+	A CharacterMap which is how another CharacterMap (its source) was when the snapshot was taken. Usually made by calling CharacterMap.snapshot()
 
-	A CharacterMap is actually broken down into a series of rows
+	It keeps only the stored rows which the source has written to since (self.saved) and reads the rest straight from the source, which still has them unchanged.
+	Snapshots can't be changed. Anything which would draw on one raises a TypeError. Draw it on a CharacterMap (or clone() it) to get a copy to change
 	"""
-	def __init__(self, width):
-		self.width = width
-		self.characters = [' ' for i in range(0, width)]
-	def __getitem__(self, i):
-		return self.characters[i]
-	def __setitem__(self, i, character):
-		self.characters[i] = character
+	def __init__(self, source):
+		"""
+		Constructor for the CharacterMapSnapshot. Usually you would call source.snapshot() instead. See CharacterMap.snapshot()
+
+		source: the CharacterMap to take a snapshot of. It must store its characters in self.data like a CharacterMap does
+		"""
+		self.source = source
+		self.width, self.height = source.width, source.height
+		self.origin_x, self.origin_y = source.origin_x, source.origin_y # the source may be scrolled afterwards, which doesn't change the stored rows
+		self.saved = {} # the stored rows which the source has written to since, each an array of characters as it was when the snapshot was taken
+
+	def snapshot(self):
+		"""
+		Same as taking a snapshot of a normal character map. A snapshot never changes so it is its own snapshot. See CharacterMap
+		"""
+		return self
+
+	# everything which would change the snapshot refuses to. draw_image(), write_text() and views all draw through _set_run()
+	def fill(self, character): self._unchangeable()
+	def scroll_up(self, amount = 1): self._unchangeable()
+	def scroll_down(self, amount = 1): self._unchangeable()
+	def scroll_left(self, amount = 1): self._unchangeable()
+	def scroll_right(self, amount = 1): self._unchangeable()
+	def __setitem__(self, x_y, value): self._unchangeable()
+	def _set_run(self, x, y, run): self._unchangeable()
+	def restore(self, snapshot): self._unchangeable()
+
+	def _unchangeable(self):
+		raise TypeError("a CharacterMapSnapshot can't be changed. Draw it on a CharacterMap to change a copy of it")
+
+	def __getitem__(self, x_y):
+		"""
+		Same as getting a value in a normal character map. See CharacterMap
+		"""
+		x, y = x_y
+		if 0 <= x < self.width and 0 <= y < self.height:
+			return self._get_run(x, x + 1, y)[0]
+		return None # return None when character is completely out of bounds
+
 	def __str__(self):
-		return ''.join(self.characters) #just joining the characters together to form a row string
+		"""
+		Same as converting a normal character map to a string. See CharacterMap
+		"""
+		return '\n'.join([self._get_run(0, self.width, y).tounicode() for y in range(0, self.height)])
+
 	def __eq__(self, other):
-		return self.width == other.width and all([d == e for d, e in zip(self.characters, other.characters)])
+		"""
+		Compares the content of two character maps to see if they are identical
+
+		Comparing with the source, or another snapshot of it, scrolled the same way only compares the rows either has saved. The others are shared so they must be the same
+		"""
+		source = other.source if isinstance(other, CharacterMapSnapshot) else other
+		if source is not self.source or (other.origin_x, other.origin_y) != (self.origin_x, self.origin_y): return CharacterMap.__eq__(self, other)
+		saved = other.saved if other is not source else {}
+		for row in set(self.saved).union(saved):
+			mine, theirs = self._stored_row(row), other._stored_row(row) if other is not source else source.data[row*self.width:(row + 1)*self.width]
+			if mine is not theirs and mine != theirs: return False # snapshots taken between the same writes share the same copy of a row
+		return True
+
+	def _stored_row(self, row):
+		"""
+		return: the array of characters in stored row row as it was when the snapshot was taken
+		"""
+		run = self.saved.get(row)
+		return run if run is not None else self.source.data[row*self.width:(row + 1)*self.width]
+
+	def _get_run(self, x0, x1, y):
+		"""
+		Same as CharacterMap._get_run(). The row comes from self.saved if the source has written to it since, otherwise from the source
+		"""
+		if not self.width: return array(TYPECODE) # same as CharacterMap._get_run()
+		row = (y + self.origin_y) % self.height
+		run = self.saved.get(row)
+		data, o = (run, 0) if run is not None else (self.source.data, row*self.width) # the offset where the row is stored
+		a = o + (x0 + self.origin_x) % self.width # the offset of the first cell
+		b = a + x1 - x0 # the offset just past the last cell
+		if b <= o + self.width: return data[a:b] # it is all in one piece
+		return data[a:o + self.width] + data[o:b - self.width] # the end of the stored row then its beginning
+
+class History():
+	"""
+	An undo and redo history of a CharacterMap made of snapshots. Usually made by calling CharacterMap.history(). See CharacterMap.snapshot()
+
+	Since the snapshots share the rows which haven't changed (and snapshots taken one after the other share the copies of the rows which have)
+	the memory it takes grows with how much was changed, not with how many steps are kept. eg
+
+	history = board.history(50)
+	...
+	if key == 'u': history.undo()
+	else:
+		history.save()
+		make_move(board, key)
+	"""
+	def __init__(self, character_map, size = 100):
+		"""
+		Constructor for the History. Usually you would call character_map.history(size) instead
+
+		character_map: the CharacterMap to keep the history of
+		size: a positive integer, the most steps which can be undone. The oldest are forgotten first
+		"""
+		self.character_map = character_map
+		self.undos = deque(maxlen = size) # snapshots to go back to, the most recent last
+		self.redos = deque(maxlen = size) # snapshots undone, to go forward to again, the most recently undone last
+
+	def save(self):
+		"""
+		Remembers how the map is now so a later undo() comes back to it. Call it before each change which should be undoable. Anything which was undone can't be redone any more
+		"""
+		self.undos.append(self.character_map.snapshot())
+		self.redos.clear()
+
+	def undo(self):
+		"""
+		Puts the map back the way it was at the most recent save() not undone yet
+
+		return: True if it did, False if there was nothing to undo
+		"""
+		return self._step(self.undos, self.redos)
+
+	def redo(self):
+		"""
+		Takes back the most recent undo()
+
+		return: True if it did, False if there was nothing to redo
+		"""
+		return self._step(self.redos, self.undos)
+
+	def clear(self):
+		"""
+		Forgets everything to undo or redo. eg when a new level starts
+		"""
+		self.undos.clear()
+		self.redos.clear()
+
+	def _step(self, source, destination):
+		"""
+		Saves how the map is now on destination and restores it from the snapshot on the end of source
+		"""
+		if not source: return False
+		destination.append(self.character_map.snapshot())
+		self.character_map.restore(source.pop())
+		return True
+
+class Sprite():
+	"""
+	A precompiled image for drawing with a chromakey (see CharacterMap.draw_image()). Usually made by calling CharacterMap.compile()
+
+	For each row the Sprite remembers only the runs of opaque (non chromakey) characters along with the column where each run starts.
+	Drawing it writes each run as one slice and simply skips over the transparent gaps, so the chromakey never has to be tested again.
+	The cost of drawing depends on the number of runs, not the number of cells in the whole rectangle.
+	"""
+	def __init__(self, character_map, chromakey = ' '):
+		"""
+		Constructor for the Sprite. Usually you would call character_map.compile(chromakey) instead. See CharacterMap.compile()
+
+		character_map: the CharacterMap of the appearance of the Sprite
+		chromakey: a single character string representing the transparent characters. None means nothing is transparent
+		"""
+		self.width = character_map.width
+		self.height = character_map.height
+		self.chromakey = chromakey
+		self.spans = [] # for each row a list of (column, run) pairs where run is an array of the opaque characters starting at that column
+		for y in range(0, self.height):
+			row = character_map._get_run(0, self.width, y).tounicode()
+			pieces = row.split(chromakey) if chromakey is not None else [row] # the pieces between the transparent characters
+			spans = []
+			x = 0
+			for piece in pieces:
+				if piece: spans.append((x, array(TYPECODE, piece))) # empty pieces are where transparent characters were next to each other
+				x += len(piece) + 1 # skip over the piece and the transparent character after it
+			self.spans.append(spans)
+
+	def draw(self, character_map, x, y):
+		"""
+		Draws this Sprite on the given CharacterMap at position x, y. Same as character_map.draw_image(x, y, sprite). See CharacterMap.draw_image()
+
+		The Sprite is properly clipped if it runs off the map
+
+		character_map: a CharacterMap to draw on
+		x: an integer representing the x coordinate where the top left character of the sprite appears
+		y: an integer representing the y coordinate where the top left character of the sprite appears
+		"""
+		width = character_map.width
+		for yi in range(max(0, y), min(character_map.height, y + self.height)): # go through the clipped rows
+			for column, run in self.spans[yi - y]: # and the opaque runs in that row
+				x0 = x + column # where the run starts and ends on the map
+				x1 = x0 + len(run)
+				if x0 >= 0 and x1 <= width: # most of the time the whole run fits
+					character_map._set_run(x0, yi, run)
+				elif x0 < width and x1 > 0: # otherwise clip the run on the left and the right
+					character_map._set_run(max(0, x0), yi, run[max(0, -x0):width - x0])
+
+class CharacterMapView(CharacterMap):
+	"""
+	A CharacterMap which shows a rectangle of another CharacterMap (its parent) and shares the parent's characters instead of having its own. See CharacterMap.view()
+
+	Every read and write is simply passed on to the parent after moving it by the position of the rectangle. It keeps no character data of its own.
+	"""
+	def __init__(self, parent, x, y, width, height):
+		"""
+		Constructor for the CharacterMapView. Usually you would call parent.view(x, y, width, height) instead. See CharacterMap.view()
+
+		parent: the CharacterMap (or any kind of CharacterMap like a CharacterDisplay or another view) to view
+		x, y: integers representing the top left of the rectangle in the parent. The rectangle is clipped to the parent
+		width, height: positive integers representing the size of the rectangle
+		"""
+		x0, y0 = max(0, x), max(0, y) # clip the rectangle to the parent
+		x1, y1 = min(parent.width, x + width), min(parent.height, y + height)
+		self.parent = parent
+		self.x, self.y = x0, y0 # the top left of the view in the parent's coordinates
+		self.width, self.height = max(0, x1 - x0), max(0, y1 - y0)
+
 	def fill(self, character):
-		self.characters = [character for i in range(0, self.width)] # set each item in the row to the char value given
+		"""
+		Same as filling a normal character map, but only the rectangle of the parent is filled. See CharacterMap
+		"""
+		run = array(TYPECODE, [character]) * self.width # one row of the character is enough. It is written to every row
+		for y in range(0, self.height):
+			self.parent._set_run(self.x, self.y + y, run)
+
+	def snapshot(self):
+		"""
+		Same as taking a snapshot of a normal character map, except the characters are copied straight away since they are really the parent's. See CharacterMap
+		"""
+		return CharacterMap.clone(self).snapshot()
+
+	def scroll_up(self, amount = 1):
+		"""
+		Same as scrolling a normal character map, only the rectangle rolls around. See CharacterMap
+
+		The view shares its rows with the parent so they are actually copied, unlike a normal CharacterMap
+		"""
+		self._set_rows(self._rows(), amount % self.height)
+
+	def scroll_down(self, amount = 1):
+		"""
+		Same as scrolling a normal character map, only the rectangle rolls around. See CharacterMap
+		"""
+		self._set_rows(self._rows(), -amount % self.height)
+
+	def scroll_left(self, amount = 1):
+		"""
+		Same as scrolling a normal character map, only the rectangle rolls around. See CharacterMap
+		"""
+		amount = amount % self.width
+		self._set_rows([row[amount:] + row[0:amount] for row in self._rows()], 0)
+
+	def scroll_right(self, amount = 1):
+		"""
+		Same as scrolling a normal character map, only the rectangle rolls around. See CharacterMap
+		"""
+		amount = -amount % self.width
+		self._set_rows([row[amount:] + row[0:amount] for row in self._rows()], 0)
+
+	def __setitem__(self, x_y, value):
+		"""
+		Same as setting a value in a normal character map. The value is set in the parent. See CharacterMap
+		"""
+		x, y = x_y
+		if 0 <= x < self.width and 0 <= y < self.height: # clip to the view, not just the parent
+			self.parent[self.x + x, self.y + y] = value
+
+	def __getitem__(self, x_y):
+		"""
+		Same as getting a value in a normal character map. The value comes from the parent. See CharacterMap
+		"""
+		x, y = x_y
+		if 0 <= x < self.width and 0 <= y < self.height:
+			return self.parent[self.x + x, self.y + y]
+		return None # return None when character is completely out of bounds of the view
+
+	def __str__(self):
+		"""
+		Same as converting a normal character map to a string. See CharacterMap
+		"""
+		return '\n'.join([run.tounicode() for run in self._rows()])
+
+	def _get_run(self, x0, x1, y):
+		"""
+		Same as CharacterMap._get_run(). The run is read from the parent
+		"""
+		return self.parent._get_run(self.x + x0, self.x + x1, self.y + y)
+
+	def _set_run(self, x, y, run):
+		"""
+		Same as CharacterMap._set_run(). The run is written to the parent
+		"""
+		self.parent._set_run(self.x + x, self.y + y, run)
+
+	def _rows(self):
+		"""
+		Reads all the rows of the view as a list of arrays of characters
+		"""
+		return [self._get_run(0, self.width, y) for y in range(0, self.height)]
+
+	def _set_rows(self, rows, start):
+		"""
+		Writes a list of rows back into the view starting with rows[start] at the top and wrapping around
+		"""
+		for y in range(0, self.height):
+			self._set_run(0, y, rows[(start + y) % self.height])
+
+class NumpyCharacterMap(CharacterMap):
+	"""
+	A CharacterMap which stores its characters in a 2 dimensional numpy array of unicode code points (self.codes[y, x]) instead of a flat array.
+
+	It behaves exactly like a CharacterMap and the two kinds can be drawn on each other freely.
+	The difference is speed: draw_image() between two NumpyCharacterMaps copies the whole clipped block with one slice assignment
+	and a chromakey only costs one masked copy instead of a comparison of every cell in python.
+	Reading and writing single cells is a little slower than a CharacterMap, so use it for big layers that are mostly drawn with draw_image(). eg see examples/parallax_scroll.py
+
+	numpy is optional. If it is not installed NumpyCharacterMap is simply another name for CharacterMap (see the bottom of this class)
+	"""
+	def __init__(self, width, height):
+		"""
+		Constructor for the NumpyCharacterMap. The width and height must be specified.
+
+		The data is constructed and filled with ' ' blanks
+
+		width: a positive integer representing the desired width of the map
+		height: a positive integer representing the desired height of the map
+		"""
+		self.width = width
+		self.height = height
+		self.codes = numpy.full((self.height, self.width), ord(' '), dtype=CODE_DTYPE) # one row of code points for each row of the map
+
+	def fill(self, character):
+		"""
+		Same as filling a normal character map. See CharacterMap
+		"""
+		self.codes[:, :] = ord(character)
+
+	def draw_image(self, x, y, character_map, chromakey = None):
+		"""
+		Same as drawing onto a normal character map, but the whole clipped block is copied at once. See CharacterMap
+		"""
+		if isinstance(character_map, Sprite): return character_map.draw(self, x, y) # sprites know where their see through gaps are already. See Sprite.draw()
+		x0 = max(0, x) # clip exactly like CharacterMap.draw_image()
+		y0 = max(0, y)
+		x1 = min(self.width, x + character_map.width)
+		y1 = min(self.height, y + character_map.height)
+		if x0 >= x1 or y0 >= y1: return # nothing is left to draw once it is clipped
+		if isinstance(character_map, NumpyCharacterMap): # take the block straight out of the other map's array
+			block = character_map.codes[y0-y:y1-y, x0-x:x1-x]
+		else: # otherwise convert the other map's clipped rows to code points
+			block = numpy.array([_codes(character_map._get_run(x0-x, x1-x, yi-y)) for yi in range(y0, y1)])
+		if chromakey is None:
+			self.codes[y0:y1, x0:x1] = block # one slice assignment does the whole copy
+		else:
+			numpy.copyto(self.codes[y0:y1, x0:x1], block, where = block != ord(chromakey)) # copy only where the block is not the chromakey "colour"
+
+	def clone(self):
+		"""
+		Creates a new copy of this NumpyCharacterMap of the same width and height. See CharacterMap
+		"""
+		cmap = NumpyCharacterMap(self.width, self.height)
+		cmap.codes[:, :] = self.codes
+		return cmap
+
+	def snapshot(self):
+		"""
+		Same as taking a snapshot of a normal character map, except the characters are copied straight away (into a CharacterMap) since the rows of a numpy array can't be shared the same way. See CharacterMap
+		"""
+		return CharacterMap.clone(self).snapshot()
+
+	def scroll_up(self, amount = 1):
+		"""
+		Same as scrolling a normal character map. See CharacterMap
+		"""
+		self.codes[:, :] = numpy.roll(self.codes, -(amount % self.height), axis = 0)
+
+	def scroll_down(self, amount = 1):
+		"""
+		Same as scrolling a normal character map. See CharacterMap
+		"""
+		self.codes[:, :] = numpy.roll(self.codes, amount % self.height, axis = 0)
+
+	def scroll_left(self, amount = 1):
+		"""
+		Same as scrolling a normal character map. See CharacterMap
+		"""
+		self.codes[:, :] = numpy.roll(self.codes, -(amount % self.width), axis = 1)
+
+	def scroll_right(self, amount = 1):
+		"""
+		Same as scrolling a normal character map. See CharacterMap
+		"""
+		self.codes[:, :] = numpy.roll(self.codes, amount % self.width, axis = 1)
+
+	def __setitem__(self, x_y, value):
+		"""
+		Same as setting a value in a normal character map. See CharacterMap
+		"""
+		x, y = x_y
+		if 0 <= x < self.width and 0 <= y < self.height: # nothing happens if we try to draw off the map
+			self.codes[y, x] = ord(value)
+
+	def __getitem__(self, x_y):
+		"""
+		Same as getting a value in a normal character map. See CharacterMap
+		"""
+		x, y = x_y
+		if 0 <= x < self.width and 0 <= y < self.height:
+			return chr(self.codes[y, x])
+		return None # return None when character is completely out of bounds
+
+	def __str__(self):
+		"""
+		Same as converting a normal character map to a string. See CharacterMap
+		"""
+		s = self.codes.tobytes().decode('utf-32-le') # the code points are already utf-32 text so the whole map converts in a single step
+		return '\n'.join([s[y*self.width:(y + 1)*self.width] for y in range(0, self.height)])
+
+	def __eq__(self, other):
+		"""
+		Compares the content of two character maps to see if they are identical
+		"""
+		if isinstance(other, NumpyCharacterMap): # compare the whole arrays at once
+			return self.codes.shape == other.codes.shape and bool(numpy.array_equal(self.codes, other.codes))
+		return CharacterMap.__eq__(self, other)
+
+	def _get_run(self, x0, x1, y):
+		"""
+		Same as CharacterMap._get_run(). The code points are converted back to an array of characters
+		"""
+		return array(TYPECODE, self.codes[y, x0:x1].tobytes().decode('utf-32-le'))
+
+	def _set_run(self, x, y, run):
+		"""
+		Same as CharacterMap._set_run(). The characters are converted to code points
+		"""
+		self.codes[y, x:x + len(run)] = _codes(run)
+
+if numpy is None:
+	NumpyCharacterMap = CharacterMap # without numpy fall back to the pure python CharacterMap. It has exactly the same behaviour
+
+def _codes(run):
+	"""
+	Converts an array of characters to a numpy array of their code points. See NumpyCharacterMap
+	"""
+	return numpy.frombuffer(run.tounicode().encode('utf-32-le'), dtype=CODE_DTYPE)
 
 def load(filename):
 	"""
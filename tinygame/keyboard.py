@@ -7,9 +7,12 @@ This code is based largley on the post at http://effbot.org/pyfaq/how-do-i-get-a
 import termios	# module get and set terminal attributes
 import fcntl	# module to manipulate a file descriptor (ie the standard input file descriptor)
 import sys, os	# opersting system wrapper module
+import time
+from collections import deque # a list like container which can be limited to a size, for the keys pressed
 import select	# a module exposing the lowleve select() call which allows a program to monitor multiple file  descriptors,  waiting  until  one or more of the file descriptors become "ready" for some class of I/O operation (e.g., input possible).
 
 from tinygame.character_display import ESCAPE, CSI # we read ANSI escape sequences for special keys similar to printing them for display. See character_display.py
+from tinygame import backend # the keys may come from somewhere other than the keyboard, eg a script when running headless. See backend.py
 
 KEY_ESCAPE = ESCAPE
 KEY_TAB = chr(9)
@@ -20,6 +23,37 @@ KEY_DOWN = CSI + "B"
 KEY_RIGHT = CSI + "C"
 KEY_LEFT = CSI + "D"
 KEY_BACKSPACE = chr(127)
+KEY_INSERT = CSI + "2~"
+KEY_HOME = CSI + "H"
+KEY_END = CSI + "F"
+KEY_PAGE_UP = CSI + "5~"
+KEY_PAGE_DOWN = CSI + "6~"
+SS3 = ESCAPE + "O" # some keys are sent starting with this Single Shift 3 sequence instead of CSI
+KEY_F1 = SS3 + "P"
+KEY_F2 = SS3 + "Q"
+KEY_F3 = SS3 + "R"
+KEY_F4 = SS3 + "S"
+KEY_F5 = CSI + "15~"
+KEY_F6 = CSI + "17~"
+KEY_F7 = CSI + "18~"
+KEY_F8 = CSI + "19~"
+KEY_F9 = CSI + "20~"
+KEY_F10 = CSI + "21~"
+KEY_F11 = CSI + "23~"
+KEY_F12 = CSI + "24~"
+
+# the modifier keys held with a key. See modifiers()
+MOD_SHIFT = 1
+MOD_ALT = 2
+MOD_CTRL = 4
+
+# the other ways consoles send some of the keys, and the key constant they are turned into so games only need to check for one
+SAME_KEYS = {
+	SS3 + "A": KEY_UP, SS3 + "B": KEY_DOWN, SS3 + "C": KEY_RIGHT, SS3 + "D": KEY_LEFT, # in "application cursor" mode
+	SS3 + "H": KEY_HOME, SS3 + "F": KEY_END, CSI + "1~": KEY_HOME, CSI + "7~": KEY_HOME, CSI + "4~": KEY_END, CSI + "8~": KEY_END,
+	CSI + "11~": KEY_F1, CSI + "12~": KEY_F2, CSI + "13~": KEY_F3, CSI + "14~": KEY_F4, # rxvt
+	CSI + "[A": KEY_F1, CSI + "[B": KEY_F2, CSI + "[C": KEY_F3, CSI + "[D": KEY_F4, CSI + "[E": KEY_F5, # the Linux console
+}
 
 def initialize():
 	"""
@@ -49,22 +83,273 @@ def getch(timeout = 0):
 	Styled after the getch() function in <conio.h> in C
 	It is a nonblocking call to read the keyboard. You call it and wait for a maximum amount of time for a key press. If a key has already been pressed it returns immediately.
 	The name can be misleading since key hits are sometimes escape sequences containing several characters. eg ESC[A is the Up key. Nevertheless the most recent full key character string is returned
+	Any keys pressed before the most recent one are thrown away. Use poll_events() or next_event() to get every key
 
 	timeout: a floating point value representing the maximum amount of time (in second units) to wait for a key press. If it is 0, the function returns immediately and reports the most recent key
 	return: a string representing the key pressed may be None if no key was pressed. eg 'x' for the x key or 'ESC[A' for the up arrow key
 	"""
+	events = poll_events()
+	if not events:
+		event = next_event(timeout)
+		if event is None: return None # no input
+		events = [event] + poll_events()
+	return events[-1][0] # only the most recent key
+
+def poll_events():
+	"""
+	Takes every key the user has pressed which the game hasn't taken yet, without waiting
+
+	return: a list of (key, timestamp) events in the order the keys were pressed. The key is a string like getch() returns and the timestamp is the time it was read in seconds (see backend.py). The list is empty if no key was pressed
+	"""
+	return backend.get().poll_events() # normally this is poll_console_events() below
+
+def next_event(timeout = 0):
+	"""
+	Takes the first key the user pressed which the game hasn't taken yet, waiting for one if need be
+
+	timeout: a floating point value representing the maximum amount of time (in second units) to wait for a key press. If it is 0, the function returns immediately
+	return: a (key, timestamp) event like poll_events() returns, or None if no key was pressed in time
+	"""
+	return backend.get().next_event(timeout) # normally this is next_console_event() below
+
+class EventQueue():
+	"""
+	The keys pressed which the game hasn't taken yet, as (key, timestamp) events in the order they were pressed
+
+	It is a ring buffer. If the game doesn't take the keys and it fills up, the oldest ones are thrown away (and counted in self.dropped)
+	"""
+	def __init__(self, size = 256):
+		"""
+		size: the most events it holds
+		"""
+		self.events = deque(maxlen = size)
+		self.dropped = 0 # how many events were thrown away because it was full
+
+	def add(self, keys, timestamp):
+		"""
+		Adds the keys read at the same time to the end
+
+		keys: a list of key strings, eg from split_keys()
+		timestamp: the time they were read
+		"""
+		for key in keys:
+			if len(self.events) == self.events.maxlen: self.dropped += 1
+			self.events.append((key, timestamp))
+
+	def take(self):
+		"""
+		return: the first event, which is removed, or None if it is empty
+		"""
+		return self.events.popleft() if self.events else None
+
+	def take_all(self):
+		"""
+		return: a list of all the events, which are removed
+		"""
+		events = list(self.events)
+		self.events.clear()
+		return events
+
+console_events = EventQueue() # the keys read from the console keyboard which the game hasn't taken yet
+
+def split_keys(text):
+	"""
+	Splits text read from a keyboard into the keys pressed
+
+	eg 'a' + KEY_LEFT + KEY_UP is split into ['a', KEY_LEFT, KEY_UP]
+	return: a list of key strings, in the order they were pressed. A lone ESC at the end counts as KEY_ESCAPE
+	"""
+	decoder = KeyDecoder()
+	keys = decoder.feed(text.encode('utf-8', 'surrogateescape'), 0)
+	return keys + decoder.flush(None)
+
+def modifiers(key):
+	"""
+	Splits a key pressed while holding modifier keys into the key and the modifiers
+
+	eg CSI + "1;5A" (Ctrl and Up) gives (KEY_UP, MOD_CTRL)
+	return: a pair of the key without modifiers and the modifiers held, which are MOD_SHIFT, MOD_ALT and MOD_CTRL added together (0 for none)
+	"""
+	if not key.startswith(CSI) or ';' not in key: return key, 0
+	number, modifier = key[len(CSI):-1].split(';', 1)
+	try:
+		held = int(modifier) - 1 # the modifiers are sent as 1 plus the sum of them
+	except ValueError:
+		return key, 0
+	final = key[-1]
+	if final == '~': key = CSI + number + '~' # eg CSI 5;2~ is shift Page Up
+	elif final in 'PQRS': key = SS3 + final # F1 to F4
+	else: key = CSI + final # the arrows, Home and End
+	return SAME_KEYS.get(key, key), held
+
+def utf8_length(byte):
+	"""
+	return: how many bytes the UTF-8 character starting with the given byte has, or 0 if it can't start a character
+	"""
+	if 0xc2 <= byte < 0xe0: return 2
+	if 0xe0 <= byte < 0xf0: return 3
+	if 0xf0 <= byte < 0xf5: return 4
+	return 0
+
+ASCII = [chr(i) for i in range(0, 128)] # the key strings for the one byte keys, made once so reading them makes no new strings
+
+class KeyDecoder():
+	"""
+	Turns the bytes read from a keyboard into keys, one byte at a time. A key cut off at the end of one read is finished at the start of the next
+
+	It knows control sequences (CSI), SS3 sequences (eg F1 to F4 and the arrows in "application cursor" mode) including the ones for function keys
+	and modifiers (see modifiers()), and UTF-8 characters of several bytes.
+	Esc is sent as the same byte (ESC) that starts the sequences, so an ESC on its own only counts as KEY_ESCAPE if nothing more comes within escape_timeout seconds. See flush()
+	"""
+	def __init__(self, escape_timeout = 0.05):
+		"""
+		escape_timeout: how long to wait, in seconds, for the rest of a sequence after an ESC before deciding it was the Esc key
+		"""
+		self.escape_timeout = escape_timeout
+		self.pending = bytearray() # the bytes of the key being read, until it is finished. Reused for every key
+		self.needed = 0 # how many bytes the UTF-8 character being read has
+		self.escape_time = 0 # when the ESC at the start of self.pending was read
+		self.sequences = dict(SAME_KEYS) # the key string for each sequence seen, so each one is only made once. Starts with the ones turned into another key
+
+	def feed(self, data, now):
+		"""
+		Decodes bytes read from the keyboard
+
+		data: a bytes like object, eg a memoryview of a buffer
+		now: the time they were read
+		return: a list of the keys finished by these bytes
+		"""
+		keys = []
+		pending = self.pending
+		i = 0
+		while i < len(data):
+			byte = data[i]
+			i += 1
+			if not pending: # the start of a key
+				if byte < 0x80 and byte != 0x1b:
+					keys.append(ASCII[byte]) # almost all keys are simply this
+				elif byte == 0x1b: # maybe Esc, maybe the start of a sequence
+					pending.append(byte)
+					self.escape_time = now
+				else:
+					self.needed = utf8_length(byte)
+					if self.needed: pending.append(byte)
+					else: keys.append('\ufffd') # not valid UTF-8
+				continue
+			if pending[0] != 0x1b: # in the middle of a UTF-8 character
+				if 0x80 <= byte < 0xc0:
+					pending.append(byte)
+					if len(pending) == self.needed:
+						keys.append(pending.decode('utf-8', 'replace'))
+						pending.clear()
+				else: # cut short, so it was not valid UTF-8 and this byte starts the next key
+					keys.append('\ufffd')
+					pending.clear()
+					i -= 1
+				continue
+			if len(pending) == 1: # after an ESC
+				if byte == 0x5b or byte == 0x4f: # [ or O, so a CSI or SS3 sequence
+					pending.append(byte)
+				else: # anything else means the ESC was the Esc key, and this byte starts the next key
+					keys.append(KEY_ESCAPE)
+					pending.clear()
+					i -= 1
+				continue
+			pending.append(byte)
+			if byte == 0x5b and len(pending) == 3: # the Linux console sends CSI [ A for F1 etc, so the sequence goes on
+				continue
+			if pending[1] == 0x4f or 0x40 <= byte <= 0x7e: # the end of a sequence. SS3 sequences are one character after the O
+				keys.append(self.sequence())
+			elif not 0x20 <= byte <= 0x3f or len(pending) > 32: # not part of a sequence, so the user must have typed the characters themselves
+				keys.extend(self.give_up())
+		return keys
+
+	def sequence(self):
+		"""
+		return: the key string for the sequence in self.pending, which is cleared
+		"""
+		data = bytes(self.pending)
+		self.pending.clear()
+		key = self.sequences.get(data.decode('latin-1'))
+		if key is None:
+			key = data.decode('latin-1')
+			if len(self.sequences) < 1024: self.sequences[key] = key # don't keep every one of a flood of made up sequences
+		return key
+
+	def give_up(self):
+		"""
+		Takes the bytes in self.pending as separate keys (starting with KEY_ESCAPE) after all
+
+		return: a list of the keys
+		"""
+		keys = [KEY_ESCAPE] + [ASCII[byte] if byte < 0x80 else '\ufffd' for byte in self.pending[1:]]
+		self.pending.clear()
+		return keys
+
+	def deadline(self):
+		"""
+		return: the time when an ESC waiting for the rest of a sequence will count as the Esc key, or None if there isn't one waiting
+		"""
+		if self.pending and self.pending[0] == 0x1b: return self.escape_time + self.escape_timeout
+		return None
+
+	def flush(self, now):
+		"""
+		Decides an ESC waiting for the rest of a sequence was the Esc key if it has waited escape_timeout seconds
+
+		now: the time now, or None to decide it regardless
+		return: a list of the keys finished, usually empty
+		"""
+		deadline = self.deadline()
+		if deadline is None or now is not None and now < deadline: return []
+		return self.give_up()
+
+console_decoder = KeyDecoder() # decodes the bytes read from the console keyboard
+console_buffer = bytearray(4096) # what is read from the console keyboard goes in here. Reused for every read
+
+def read_console(timeout = 0):
+	"""
+	Waits for the user to press keys on the console keyboard and adds every key read to console_events
+
+	timeout: a floating point value representing the maximum amount of time (in second units) to wait for a key press
+	return: True if any keys were read
+	"""
 	# since there is only one keyboard we store keyboard in these global variables
 	global __keyboard_file_descriptor # the filedesciptor of standard input (keyboard)
 
+	deadline = console_decoder.deadline()
+	if deadline is not None: timeout = max(0, min(timeout, deadline - time.perf_counter())) # don't wait past the time a waiting ESC becomes the Esc key
 	r, w, e = select.select([__keyboard_file_descriptor], [], [], timeout) # wait at most timeout for reads to be available on standard input
+	now = time.perf_counter()
+	keys = []
 	if r: # check if it returned because input is available
-		q = sys.stdin.read() # if so read a key from standard in
-		tokens = q.split(CSI) # get escape sequences
-		if len(tokens) == 1: # check if there is no escape sequence
-			return tokens[0] # if so simply return the key
-		else:
-			return CSI + tokens[-1] # otherwise return only the most recent escape sequence
-	return None # no input
+		try:
+			size = os.readv(__keyboard_file_descriptor, [console_buffer]) # if so read the bytes straight into the buffer
+		except BlockingIOError:
+			size = 0
+		keys = console_decoder.feed(memoryview(console_buffer)[0:size], now)
+	keys += console_decoder.flush(now)
+	if keys:
+		console_events.add(keys, backend.get().time())
+		return True
+	return False # no input
+
+def poll_console_events():
+	"""
+	Same as poll_events() for the console keyboard. This is how poll_events() works unless another backend is in use. See backend.py
+	"""
+	read_console(0)
+	return console_events.take_all()
+
+def next_console_event(timeout = 0):
+	"""
+	Same as next_event() for the console keyboard. This is how next_event() works unless another backend is in use. See backend.py
+	"""
+	end = time.perf_counter() + timeout
+	while not console_events.events:
+		read_console(max(0, end - time.perf_counter()))
+		if time.perf_counter() >= end: break # out of time. An ESC still waiting becomes the Esc key on a later call
+	return console_events.take()
 
 def quit():
 	"""
@@ -0,0 +1,450 @@
+"""
+profile
+A submodule of tinygame for finding out where the time goes in each frame of a game. eg when it stutters on a Raspberry Pi
+
+Each frame's time is split into phases:
+ input	waiting for and reading keys (keyboard.getch(), poll_events() and next_event())
+ sleep	waiting for the next frame (Metronome.wait_for_tick() and tinygame.sleep())
+ compose	drawing on CharacterMaps (draw_image(), write_text(), fill() etc)
+ serialize	turning the rows drawn on into text when a display is shown (CharacterDisplay.show())
+ encode	working out and encoding what changed on the console (see character_display.Terminal)
+ write	writing that to the console
+ update	everything else, which is the game's own logic
+The time of each phase in each of the most recent frames is kept, and at the end a summary of them is printed.
+It can also show a line of the most recent times over the bottom row of the display (the HUD), without changing the display itself
+
+Turn it on without changing the game by setting the TINYGAME_PROFILE environment variable, eg
+ TINYGAME_PROFILE=1 python examples/breakout.py	(the summary when the game quits)
+ TINYGAME_PROFILE=hud python examples/breakout.py	(and the HUD)
+or by calling start() before tinygame.initialize(). A game can time its own phases too, eg
+
+profiler = tinygame.profile.start()
+...
+with profiler.phase('ai'):
+	... # the game's AI
+
+The timing works by swapping the methods which do each phase for ones which time them, so there is no cost when it is off
+
+There is also a mode for finding out what allocates memory each frame, as the more objects a frame leaves behind the more often python's garbage collector
+has to stop the game to look through them. Turn it on with TINYGAME_PROFILE=allocations (or allocations+gc to also log the garbage collections)
+or by calling allocations() before tinygame.initialize(). See AllocationProfiler
+"""
+
+import functools
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+import tinygame.backend as backend
+
+PHASES = ['input', 'update', 'compose', 'serialize', 'encode', 'write', 'sleep'] # in the order they are shown
+SHORT_NAMES = {'input': 'in', 'update': 'up', 'compose': 'co', 'serialize': 'se', 'encode': 'en', 'write': 'wr', 'sleep': 'sl'} # for the HUD
+BUCKETS = [0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1] # the upper limits, in seconds, of the histogram buckets in the summary. The last bucket is for anything longer
+
+class Phase():
+	"""
+	Times one phase in a with block. See Profiler.phase()
+	"""
+	def __init__(self, profiler, name):
+		self.profiler = profiler
+		self.name = name
+
+	def __enter__(self):
+		self.profiler.enter()
+
+	def __exit__(self, kind, value, traceback):
+		self.profiler.exit(self.name)
+
+class Profiler():
+	"""
+	A backend (see backend.py) which times the phases of each frame and otherwise passes everything on to another backend, normally the console
+	"""
+	def __init__(self, wrapped = None, hud = False, window = 300):
+		"""
+		wrapped: the backend which actually shows the frames etc. The current one if None
+		hud: True to show the most recent times over the bottom row of each frame
+		window: how many of the most recent frames to keep the times of
+		"""
+		self.wrapped = wrapped if wrapped is not None else backend.get()
+		self.hud = hud
+		self.phases = list(PHASES) # PHASES and any of the game's own. See phase()
+		self.history = {phase: deque(maxlen = window) for phase in PHASES} # the time of each phase in each of the most recent frames
+		self.frame_times = deque(maxlen = window) # the whole time of each of the most recent frames
+		self.totals = {phase: 0.0 for phase in PHASES} # the time of each phase in every frame added up
+		self.frames = 0 # how many frames there have been
+		self.current = {phase: 0.0 for phase in PHASES} # the time of each phase so far in this frame
+		self.frame_start = time.perf_counter()
+		self.presented = False # set when a frame is shown, so the frame ends when CharacterDisplay.show() does
+		self.hud_text = '' # the line shown over the bottom row. Only worked out every few frames so it can be read
+		self.local = threading.local() # the phases being timed in each thread. See enter()
+		self.hooks = [] # (owner, name, original) for each method swapped. See hook()
+
+	def hook(self, owner, name, phase, wrapper = None):
+		"""
+		Swaps a method (or a function in a module) for one which also times it as a phase
+
+		owner: the class, object or module it is in
+		name: its name
+		phase: the name of the phase
+		wrapper: makes the new method from the original, if it has to do more than time it
+		"""
+		original = getattr(owner, name)
+		self.hooks.append((owner, name, vars(owner).get(name))) # None if it was inherited from a class
+		profiler = self
+		if wrapper is None:
+			@functools.wraps(original)
+			def wrapper(*arguments, **keywords):
+				profiler.enter()
+				try:
+					return original(*arguments, **keywords)
+				finally:
+					profiler.exit(phase)
+			setattr(owner, name, wrapper)
+		else:
+			setattr(owner, name, wrapper(original))
+
+	def install(self):
+		"""
+		Swaps in the methods which time the phases. The backend's own methods below time input, sleep and encode
+		"""
+		import tinygame
+		from tinygame import character_map, character_display
+		for name in ['fill', 'write_text', 'write_text_aligned', 'draw_image', 'scroll_up', 'scroll_down', 'scroll_left', 'scroll_right']:
+			for owner in (character_map.CharacterMap, character_map.CharacterMapView, character_map.NumpyCharacterMap, character_display.CharacterDisplay):
+				if name in owner.__dict__: self.hook(owner, name, 'compose')
+		self.hook(character_map.Sprite, 'draw', 'compose')
+		self.hook(tinygame.Metronome, 'wait_for_tick', 'sleep') # besides the sleeping it may spin. See Metronome
+		self.hook(character_display.terminal, 'write', 'write')
+		profiler = self
+		def show(original):
+			@functools.wraps(original)
+			def show(display):
+				profiler.enter()
+				try:
+					original(display)
+				finally:
+					profiler.exit('serialize')
+					if profiler.presented: profiler.end_frame() # the frame ends once it is on the console
+			return show
+		self.hook(character_display.CharacterDisplay, 'show', 'serialize', show)
+
+	def uninstall(self):
+		"""
+		Puts back the methods swapped by install()
+		"""
+		for owner, name, original in reversed(self.hooks):
+			if original is None: delattr(owner, name) # it was inherited, so taking ours away leaves the inherited one
+			else: setattr(owner, name, original)
+		self.hooks = []
+
+	def phase(self, name):
+		"""
+		Times a phase of the game's own, in a with block. eg
+		with profiler.phase('ai'):
+			...
+
+		name: the name of the phase, which gets its own line in the summary. It can also be one of the PHASES
+		"""
+		return Phase(self, name)
+
+	def enter(self):
+		"""
+		Starts timing a phase. Phases can be inside each other (eg encode has write inside it) and each only counts its own time, not what is inside it
+		"""
+		stack = getattr(self.local, 'stack', None)
+		if stack is None: stack = self.local.stack = []
+		stack.append([time.perf_counter(), 0.0]) # when it started, and the time of the phases inside it so far
+
+	def exit(self, name):
+		"""
+		Stops timing the phase started by the most recent enter()
+
+		name: the name of the phase
+		"""
+		stack = self.local.stack
+		start, inside = stack.pop()
+		elapsed = time.perf_counter() - start
+		if stack: stack[-1][1] += elapsed # the phase it is inside doesn't count this time
+		if name not in self.current: self.add_phase(name)
+		self.current[name] += elapsed - inside
+
+	def add_phase(self, name):
+		self.phases.append(name)
+		self.history[name] = deque([0.0]*len(self.frame_times), maxlen = self.frame_times.maxlen) # it took no time in the frames before
+		self.totals[name] = 0.0
+		self.current[name] = 0.0
+
+	def end_frame(self):
+		"""
+		Records the times of the phases of the frame which was just shown and starts the next frame
+		"""
+		now = time.perf_counter()
+		frame_time = now - self.frame_start
+		self.current['update'] = max(0.0, frame_time - sum(seconds for phase, seconds in self.current.items() if phase != 'update')) # whatever wasn't in another phase
+		for phase, seconds in self.current.items():
+			self.history[phase].append(seconds)
+			self.totals[phase] += seconds
+			self.current[phase] = 0.0
+		self.frame_times.append(frame_time)
+		self.frames += 1
+		self.frame_start = now
+		self.presented = False
+		if self.hud and self.frames % 10 == 1: self.hud_text = self.hud_line()
+
+	def hud_line(self, frames = 30):
+		"""
+		return: a compact line of the frame rate and the average milliseconds of each phase over the most recent frames
+		"""
+		recent = list(self.frame_times)[-frames:]
+		if not recent: return ''
+		fps = len(recent)/sum(recent) if sum(recent) else 0
+		parts = ["%s %.1f" % (SHORT_NAMES.get(phase, phase), 1000*sum(list(self.history[phase])[-frames:])/len(recent)) for phase in self.phases]
+		return "%.1f fps | %s ms" % (fps, ' '.join(parts))
+
+	def summary(self):
+		"""
+		return: a table of how long each phase took per frame: the average over every frame and, over the most recent frames, the 50th, 95th and 99th percentiles,
+		        the longest, and a histogram of how many frames it took up to each of the BUCKETS
+		"""
+		lines = ["tinygame profile: %d frames" % self.frames]
+		if not self.frames: return lines[0]
+		lines.append("%-10s %8s %8s %8s %8s %8s   %s" % ('phase', 'mean ms', 'p50', 'p95', 'p99', 'max', ' '.join('<%g' % (1000*limit) for limit in BUCKETS) + ' more'))
+		for phase in self.phases + ['frame']:
+			history = sorted(self.history[phase] if phase != 'frame' else self.frame_times)
+			total = self.totals[phase] if phase != 'frame' else sum(self.totals.values())
+			counts = [0]*(len(BUCKETS) + 1)
+			bucket = 0
+			for seconds in history: # they are sorted, so the bucket only ever moves up
+				while bucket < len(BUCKETS) and seconds > BUCKETS[bucket]: bucket += 1
+				counts[bucket] += 1
+			percentile = lambda p: 1000*history[int(p*(len(history) - 1))]
+			lines.append("%-10s %8.2f %8.2f %8.2f %8.2f %8.2f   %s" % (phase, 1000*total/self.frames, percentile(.5), percentile(.95), percentile(.99), 1000*history[-1], ' '.join(str(count) for count in counts)))
+		return '\n'.join(lines)
+
+	# the backend. See backend.py
+
+	def initialize(self, render_thread = False):
+		self.wrapped.initialize(render_thread)
+		self.frame_start = time.perf_counter()
+
+	def quit(self):
+		self.wrapped.quit()
+		self.uninstall()
+		if backend.current is self: backend.use(self.wrapped) # so frames and keys stop going through the profiler once it has stopped timing them
+		print(self.summary(), file = sys.stderr) # after the console is back to normal, so it stays there to be read
+
+	def present(self, rows, scrolled = 0):
+		"""
+		Shows the frame with the wrapped backend, with the HUD over the bottom row if it is on
+		"""
+		if self.hud and self.hud_text and rows:
+			width = len(rows[-1])
+			rows = rows[:-1] + [self.hud_text[:width].ljust(width)] # a new list, as the display's rows are the ones it showed
+		self.enter()
+		try:
+			self.wrapped.present(rows, scrolled)
+		finally:
+			self.exit('encode')
+			self.presented = True
+
+	def invalidate(self):
+		self.wrapped.invalidate()
+
+	def poll_events(self):
+		self.enter()
+		try:
+			return self.wrapped.poll_events()
+		finally:
+			self.exit('input')
+
+	def next_event(self, timeout = 0):
+		self.enter()
+		try:
+			return self.wrapped.next_event(timeout)
+		finally:
+			self.exit('input')
+
+	def time(self):
+		return self.wrapped.time()
+
+	def sleep(self, seconds):
+		self.enter()
+		try:
+			self.wrapped.sleep(seconds)
+		finally:
+			self.exit('sleep')
+
+def start(hud = False, **options):
+	"""
+	Starts profiling the frames shown. Call it before tinygame.initialize(). It stops and prints the summary when tinygame.quit() is called
+
+	hud: True to show the most recent times over the bottom row of the display
+	options: passed on to Profiler. eg window = 1000
+	return: the Profiler
+	"""
+	profiler = Profiler(backend.get(), hud, **options)
+	profiler.install()
+	backend.use(profiler)
+	return profiler
+
+class AllocationProfiler(Profiler):
+	"""
+	A Profiler which records the memory each frame allocates instead of timing it. CharacterDisplay.show() is where one frame ends and the next begins
+
+	It uses tracemalloc, which sees the memory blocks which are still allocated rather than every allocation. So at the end of each frame it counts
+	the blocks and bytes allocated during the frame which are still there (by the line of code which allocated them), and the peak memory the frame
+	reached above where it started (which includes the blocks which were freed again during the frame).
+	The summary at quit lists the lines which left the most behind over all the frames, and the garbage collections there were if gc_log is True
+	"""
+	def __init__(self, wrapped = None, top = 10, gc_log = False, frames = 10):
+		"""
+		wrapped: the backend which actually shows the frames etc. The current one if None
+		top: how many lines to list in the summary
+		gc_log: True to record every garbage collection, with the frame it stopped and for how long
+		frames: how many stack frames to remember for each allocation. The line counted is the one in the game or tinygame nearest the allocation
+		"""
+		Profiler.__init__(self, wrapped)
+		self.top = top
+		self.gc_log = gc_log
+		self.stack_frames = frames
+		self.was_tracing = tracemalloc.is_tracing() # eg started with python -X tracemalloc. Then it is left on when the profiler quits
+		self.allocated = {} # the (blocks, bytes) allocated by each traceback at the end of the last frame, to compare the next one to
+		self.lines = {} # (file name, line number) of each line which allocated memory which outlived its frame: [blocks, bytes] added up over every frame
+		self.net_blocks = deque(maxlen = 1000) # the blocks left behind by each of the most recent frames
+		self.net_bytes = deque(maxlen = 1000) # and the bytes
+		self.peak_bytes = deque(maxlen = 1000) # the peak memory of each of the most recent frames above where it started
+		self.frame_memory = 0 # the memory allocated at the start of this frame
+		self.collections = [] # (frame, generation, seconds, objects collected) for each garbage collection, if gc_log is True
+		self.collection_start = None
+
+	def install(self):
+		"""
+		Swaps in CharacterDisplay.show() which ends each frame
+		"""
+		from tinygame import character_display
+		profiler = self
+		def show(original):
+			@functools.wraps(original)
+			def show(display):
+				original(display)
+				if profiler.presented: profiler.end_frame()
+			return show
+		self.hook(character_display.CharacterDisplay, 'show', 'serialize', show)
+
+	def initialize(self, render_thread = False):
+		self.wrapped.initialize(render_thread)
+		if not tracemalloc.is_tracing(): tracemalloc.start(self.stack_frames)
+		if self.gc_log: gc.callbacks.append(self.collected)
+		self.allocated = self.take_snapshot()
+		self.frame_memory = tracemalloc.get_traced_memory()[0]
+		tracemalloc.reset_peak()
+
+	def quit(self):
+		if self.gc_log and self.collected in gc.callbacks: gc.callbacks.remove(self.collected)
+		if not self.was_tracing: tracemalloc.stop() # only if the profiler started it
+		Profiler.quit(self)
+
+	def take_snapshot(self):
+		"""
+		return: a dictionary of the (blocks, bytes) allocated now by each traceback. Worked out once per frame and kept for the next, rather than using Snapshot.compare_to() which works out both every time
+		"""
+		return {statistic.traceback: (statistic.count, statistic.size) for statistic in tracemalloc.take_snapshot().statistics('traceback')}
+
+	def end_frame(self):
+		"""
+		Records the memory allocated during the frame which was just shown and starts the next frame
+		"""
+		current, peak = tracemalloc.get_traced_memory()
+		self.peak_bytes.append(peak - self.frame_memory)
+		allocated = self.take_snapshot()
+		blocks = size = 0
+		for traceback, (count, total) in allocated.items():
+			before = self.allocated.get(traceback, (0, 0))
+			if count <= before[0]: continue # nothing new from here outlived the frame
+			where = self.line(traceback)
+			if where is None: continue # tracemalloc's or this profiler's own records
+			blocks += count - before[0]
+			size += max(0, total - before[1])
+			counts = self.lines.setdefault(where, [0, 0])
+			counts[0] += count - before[0]
+			counts[1] += max(0, total - before[1])
+		self.net_blocks.append(blocks)
+		self.net_bytes.append(size)
+		self.frames += 1
+		self.presented = False
+		self.allocated = allocated
+		self.frame_memory = tracemalloc.get_traced_memory()[0] # after taking the snapshot, which allocates a lot itself
+		tracemalloc.reset_peak()
+
+	def line(self, traceback):
+		"""
+		return: the (file name, line number) to count an allocation against: the line nearest the allocation which isn't in python's own library.
+		        None if it was allocated by tracemalloc or this module, ie by profiling rather than by the game
+		"""
+		library = os.path.dirname(functools.__file__) # where the standard library is
+		where = None
+		for frame in reversed(traceback): # they are in order from the oldest call to the most recent
+			if frame.filename == tracemalloc.__file__: return None
+			if where is None and not frame.filename.startswith(library): where = frame.filename, frame.lineno
+		if where is None: where = traceback[-1].filename, traceback[-1].lineno
+		return where if where[0] != __file__ else None
+
+	def collected(self, phase, info):
+		"""
+		Records a garbage collection. Called by python when one starts and stops. See gc.callbacks
+		"""
+		if phase == 'start':
+			self.collection_start = time.perf_counter()
+		elif self.collection_start is not None:
+			self.collections.append((self.frames, info['generation'], time.perf_counter() - self.collection_start, info['collected']))
+			self.collection_start = None
+
+	def summary(self):
+		"""
+		return: the blocks and bytes left behind and the peak memory per frame, the lines which left the most behind, and the garbage collections if they were recorded
+		"""
+		lines = ["tinygame allocation profile: %d frames" % self.frames]
+		if not self.frames: return lines[0]
+		count = len(self.net_blocks)
+		lines.append("per frame (the most recent %d): %.1f blocks and %.0f bytes left behind, peak %.0f bytes (max %d)" % (count, sum(self.net_blocks)/count, sum(self.net_bytes)/count, sum(self.peak_bytes)/count, max(self.peak_bytes)))
+		lines.append("%10s %12s  %s" % ('blocks', 'bytes', 'the lines which left the most behind'))
+		for (filename, lineno), (blocks, size) in sorted(self.lines.items(), key = lambda item: -item[1][1])[0:self.top]:
+			lines.append("%10d %12d  %s:%d" % (blocks, size, filename, lineno))
+		if self.gc_log:
+			lines.append("%d garbage collections" % len(self.collections))
+			for generation in range(0, 3):
+				pauses = [seconds for frame, gen, seconds, collected in self.collections if gen == generation]
+				if pauses: lines.append(" generation %d: %d, %.2f ms in all, longest %.2f ms" % (generation, len(pauses), 1000*sum(pauses), 1000*max(pauses)))
+			for frame, generation, seconds, collected in sorted(self.collections, key = lambda collection: -collection[2])[0:self.top]:
+				lines.append(" frame %d: generation %d took %.2f ms and collected %d objects" % (frame, generation, 1000*seconds, collected))
+		return '\n'.join(lines)
+
+	def present(self, rows, scrolled = 0):
+		self.wrapped.present(rows, scrolled)
+		self.presented = True
+
+	def poll_events(self):
+		return self.wrapped.poll_events()
+
+	def next_event(self, timeout = 0):
+		return self.wrapped.next_event(timeout)
+
+	def sleep(self, seconds):
+		self.wrapped.sleep(seconds)
+
+def allocations(top = 10, gc_log = False, **options):
+	"""
+	Starts recording the memory allocated by each frame. Call it before tinygame.initialize(). It stops and prints the summary when tinygame.quit() is called
+
+	top: how many of the lines which allocated the most to list in the summary
+	gc_log: True to record the garbage collections too
+	options: passed on to AllocationProfiler. eg frames = 50
+	return: the AllocationProfiler
+	"""
+	profiler = AllocationProfiler(backend.get(), top, gc_log, **options)
+	profiler.install()
+	backend.use(profiler)
+	return profiler
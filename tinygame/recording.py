@@ -0,0 +1,349 @@
+"""
+recording
+A submodule of tinygame for recording the frames a game shows to a file and playing them back later. eg for bug reports and to look at performance
+
+The file is compact because most frames only change a few characters. Every so often a whole frame (a keyframe) is stored,
+and the frames in between only store the runs of characters which changed since the frame before, like the console is sent (see character_display.Terminal).
+Each frame is compressed with zlib when that makes it smaller.
+At the end of the file there is an index of the keyframes so any frame can be found by decoding from the keyframe before it, instead of from the start of the file.
+
+To record a game, call record() before tinygame.initialize(), or from the command line
+ python -m tinygame record session.tgr examples/snake.py
+and to watch it again
+ python -m tinygame replay session.tgr --speed 4x
+
+The file format (all numbers little endian):
+ header: the MAGIC bytes
+ then one record for each frame: kind (1 byte), time in seconds since recording started (8 byte float), payload size (4 bytes) and the payload
+   kind is KEYFRAME or DELTA, plus COMPRESSED if the payload was compressed with zlib
+   a keyframe payload is the number of rows (2 bytes) then each row as its size (4 bytes) and UTF-8 text
+   a delta payload is the number of runs (4 bytes) then each run as its row and column (2 bytes each), size (4 bytes) and UTF-8 text
+ then the index: the number of keyframes (4 bytes) then for each keyframe its frame number (4 bytes) and where its record starts in the file (8 bytes)
+ and last the trailer: where the index starts (8 bytes) and the INDEX_MAGIC bytes
+"""
+
+import struct
+import zlib
+import tinygame.backend as backend
+from tinygame.character_display import changed_runs
+
+MAGIC = b'TGR1' # the start of every recording file
+INDEX_MAGIC = b'TGRI' # the end of a recording file which was closed properly and has an index
+KEYFRAME = 0 # a record holding a whole frame
+DELTA = 1 # a record holding only what changed since the frame before
+COMPRESSED = 0x80 # added to the kind of a record if its payload is compressed
+
+RECORD = struct.Struct('<BdI') # kind, time, payload size
+ROWS = struct.Struct('<H') # the number of rows in a keyframe
+ROW = struct.Struct('<I') # the size of a row in a keyframe
+RUNS = struct.Struct('<I') # the number of runs in a delta
+RUN = struct.Struct('<HHI') # row, column and size of a run in a delta
+INDEX_COUNT = struct.Struct('<I') # the number of keyframes in the index
+INDEX_ENTRY = struct.Struct('<IQ') # frame number and file offset of a keyframe
+TRAILER = struct.Struct('<Q4s') # index offset and INDEX_MAGIC
+
+class Recorder():
+	"""
+	A backend (see backend.py) which records every frame shown to a file and otherwise passes everything on to another backend, normally the console
+	"""
+	def __init__(self, path, wrapped = None, keyframe_interval = 250, compress = True):
+		"""
+		Creates a recorder writing to a new file
+
+		path: the name of the file to record to
+		wrapped: the backend which actually shows the frames etc. The current one if None
+		keyframe_interval: the most frames in a row which are stored as deltas before a whole frame is stored again. Fewer makes seeking faster but the file bigger
+		compress: True to compress each frame with zlib (when that makes it smaller)
+		"""
+		self.wrapped = wrapped if wrapped is not None else backend.get()
+		self.keyframe_interval = keyframe_interval
+		self.compress = compress
+		self.file = open(path, 'wb')
+		self.file.write(MAGIC)
+		self.index = [] # (frame number, file offset) of each keyframe
+		self.previous = None # the rows of the last frame recorded. None if there isn't one
+		self.frames = 0 # how many frames have been recorded
+		self.since_keyframe = 0 # how many deltas have been recorded since the last keyframe
+		self.start = None # the time recording started, from the wrapped backend's clock
+
+	def initialize(self, render_thread = False):
+		self.wrapped.initialize(render_thread)
+		self.start = self.wrapped.time()
+
+	def quit(self):
+		self.wrapped.quit()
+		self.close()
+		if backend.current is self: backend.use(self.wrapped) # so frames and keys stop going through it once it has stopped recording
+
+	def present(self, rows, scrolled = 0):
+		"""
+		Records the frame and then shows it with the wrapped backend
+		"""
+		if self.file is not None:
+			if self.start is None: self.start = self.wrapped.time()
+			self.write_frame(rows, self.wrapped.time() - self.start)
+		self.wrapped.present(rows, scrolled)
+
+	def invalidate(self):
+		self.wrapped.invalidate() # the recording has every frame in full or as a delta from the frame before, which is still right
+
+	def poll_events(self):
+		return self.wrapped.poll_events()
+
+	def next_event(self, timeout = 0):
+		return self.wrapped.next_event(timeout)
+
+	def time(self):
+		return self.wrapped.time()
+
+	def sleep(self, seconds):
+		self.wrapped.sleep(seconds)
+
+	def write_frame(self, rows, time):
+		"""
+		Adds a frame to the file, as a delta from the previous frame when possible
+
+		rows: a list of strings, one for each row of the frame
+		time: the time of the frame in seconds since recording started
+		"""
+		payload = None
+		if self.previous is not None and len(rows) == len(self.previous) and self.since_keyframe < self.keyframe_interval:
+			payload = encode_delta(self.previous, rows)
+		if payload is None: # the first frame, a change of size or time for a keyframe
+			self.index.append((self.frames, self.file.tell()))
+			self.write_record(KEYFRAME, time, encode_keyframe(rows))
+			self.file.flush() # so if the game crashes, all but the last few frames are in the file
+			self.since_keyframe = 0
+		else:
+			self.write_record(DELTA, time, payload)
+			self.since_keyframe += 1
+		self.previous = rows # the rows are never changed later so there is no need to copy them
+		self.frames += 1
+
+	def write_record(self, kind, time, payload):
+		if self.compress:
+			compressed = zlib.compress(payload)
+			if len(compressed) < len(payload): # tiny deltas usually get bigger so they are left alone
+				kind, payload = kind | COMPRESSED, compressed
+		self.file.write(RECORD.pack(kind, time, len(payload)))
+		self.file.write(payload)
+
+	def close(self):
+		"""
+		Writes the keyframe index and closes the file. Frames shown after this aren't recorded
+		"""
+		if self.file is None: return
+		index_offset = self.file.tell()
+		self.file.write(INDEX_COUNT.pack(len(self.index)))
+		for frame, offset in self.index:
+			self.file.write(INDEX_ENTRY.pack(frame, offset))
+		self.file.write(TRAILER.pack(index_offset, INDEX_MAGIC))
+		self.file.close()
+		self.file = None
+
+def record(path, **options):
+	"""
+	Starts recording every frame shown to a file. Call it before tinygame.initialize(). The file is finished when tinygame.quit() is called
+
+	path: the name of the file to record to
+	options: passed on to Recorder. eg compress = False
+	return: the Recorder
+	"""
+	recorder = Recorder(path, backend.get(), **options)
+	backend.use(recorder)
+	return recorder
+
+def encode_keyframe(rows):
+	data = [ROWS.pack(len(rows))]
+	for row in rows:
+		text = row.encode('utf-8')
+		data.append(ROW.pack(len(text)))
+		data.append(text)
+	return b''.join(data)
+
+def encode_delta(previous, rows):
+	"""
+	return: the payload of a delta record turning the rows previous into rows, or None if a row changed size so it has to be a keyframe
+	"""
+	data = [None] # the number of runs goes first once it is known
+	count = 0
+	for y in range(0, len(rows)):
+		row = rows[y]
+		if row == previous[y]: continue # most rows don't change
+		if len(row) != len(previous[y]): return None
+		for start, end in changed_runs(previous[y], row):
+			text = row[start:end].encode('utf-8')
+			data.append(RUN.pack(y, start, len(text)))
+			data.append(text)
+			count += 1
+	data[0] = RUNS.pack(count)
+	return b''.join(data)
+
+class Recording():
+	"""
+	A recording file opened for reading. See Recorder for how they are made
+
+	len() of it is the number of frames, frame(n) decodes one frame and iterating over it gives every frame in order
+	"""
+	def __init__(self, path):
+		"""
+		Opens a recording file and reads its keyframe index. If the file has no index (eg the game crashed before tinygame.quit()) it is rebuilt by reading through the file
+
+		path: the name of the recording file
+		"""
+		self.file = open(path, 'rb')
+		if self.file.read(len(MAGIC)) != MAGIC:
+			raise ValueError("%s is not a tinygame recording" % path)
+		self.index = [] # (frame number, file offset) of each keyframe
+		self.length = 0 # the number of frames
+		self.end = None # where the frame records end
+		if not self.read_index(): self.scan()
+
+	def read_index(self):
+		"""
+		Reads the keyframe index from the end of the file
+
+		return: False if there is none
+		"""
+		self.file.seek(0, 2)
+		size = self.file.tell()
+		if size < len(MAGIC) + TRAILER.size: return False
+		self.file.seek(size - TRAILER.size)
+		index_offset, magic = TRAILER.unpack(self.file.read(TRAILER.size))
+		if magic != INDEX_MAGIC: return False
+		self.file.seek(index_offset)
+		count, = INDEX_COUNT.unpack(self.file.read(INDEX_COUNT.size))
+		self.index = [INDEX_ENTRY.unpack(self.file.read(INDEX_ENTRY.size)) for i in range(0, count)]
+		self.end = index_offset
+		self.length = self.count_frames(self.index[-1][1]) + self.index[-1][0] if self.index else 0
+		return True
+
+	def scan(self):
+		"""
+		Rebuilds the keyframe index by reading through every record in the file
+		"""
+		offset = len(MAGIC)
+		self.end = None
+		frame = 0
+		while True:
+			self.file.seek(offset)
+			header = self.file.read(RECORD.size)
+			if len(header) < RECORD.size: break
+			kind, time, size = RECORD.unpack(header)
+			if len(self.file.read(size)) < size: break # cut off part way through a record
+			if kind & ~COMPRESSED == KEYFRAME: self.index.append((frame, offset))
+			offset += RECORD.size + size
+			frame += 1
+		self.end = offset
+		self.length = frame
+
+	def count_frames(self, offset):
+		"""
+		return: the number of records from the given offset up to the end of the frames
+		"""
+		count = 0
+		while offset < self.end:
+			self.file.seek(offset)
+			kind, time, size = RECORD.unpack(self.file.read(RECORD.size))
+			offset += RECORD.size + size
+			count += 1
+		return count
+
+	def __len__(self):
+		return self.length
+
+	def __iter__(self):
+		"""
+		Gives each frame in order as a (time, rows) pair
+		"""
+		return self.decode(len(MAGIC), 0, self.length)
+
+	def frame(self, n):
+		"""
+		Decodes one frame, starting from the keyframe before it
+
+		n: the frame number counting from 0
+		return: the frame as a (time, rows) pair, the rows being a list of strings
+		"""
+		if not 0 <= n < self.length: raise IndexError("frame %d is not in the recording" % n)
+		frame, offset = max(entry for entry in self.index if entry[0] <= n) # the last keyframe at or before frame n
+		for time_rows in self.decode(offset, frame, n + 1):
+			pass
+		return time_rows
+
+	def decode(self, offset, frame, stop):
+		"""
+		Decodes frames from the record at offset, which must be a keyframe
+
+		frame: the frame number of that record
+		stop: the frame number to stop before
+		"""
+		rows = None
+		while frame < stop:
+			self.file.seek(offset)
+			kind, time, size = RECORD.unpack(self.file.read(RECORD.size))
+			payload = self.file.read(size)
+			offset += RECORD.size + size
+			if kind & COMPRESSED: payload = zlib.decompress(payload)
+			if kind & ~COMPRESSED == KEYFRAME:
+				rows = decode_keyframe(payload)
+			else:
+				rows = decode_delta(rows, payload)
+			frame += 1
+			yield time, rows
+
+	def close(self):
+		self.file.close()
+
+def decode_keyframe(payload):
+	count, = ROWS.unpack_from(payload, 0)
+	offset = ROWS.size
+	rows = []
+	for i in range(0, count):
+		size, = ROW.unpack_from(payload, offset)
+		offset += ROW.size
+		rows.append(payload[offset:offset + size].decode('utf-8'))
+		offset += size
+	return rows
+
+def decode_delta(previous, payload):
+	"""
+	return: the rows after applying a delta payload to the rows previous. previous is left as it was
+	"""
+	rows = list(previous)
+	count, = RUNS.unpack_from(payload, 0)
+	offset = RUNS.size
+	for i in range(0, count):
+		y, x, size = RUN.unpack_from(payload, offset)
+		offset += RUN.size
+		text = payload[offset:offset + size].decode('utf-8')
+		offset += size
+		row = rows[y]
+		rows[y] = row[0:x] + text + row[x + len(text):]
+	return rows
+
+def replay(path, speed = 1.0):
+	"""
+	Plays a recording back on the console through a CharacterDisplay, at the same pace it was recorded (times speed). Press Esc to stop
+
+	path: the name of the recording file
+	speed: how many times faster than it was recorded to play it. eg 4 to play it 4 times faster
+	"""
+	import tinygame
+	recording = Recording(path)
+	tinygame.initialize()
+	try:
+		screen = None
+		previous = 0.0
+		for time, rows in recording:
+			if screen is None or screen.height != len(rows) or screen.width != max(len(row) for row in rows):
+				screen = tinygame.character_display.CharacterDisplay(max(len(row) for row in rows), len(rows))
+			if tinygame.keyboard.getch(max(0, time - previous) / speed) == tinygame.keyboard.KEY_ESCAPE: # wait until it is time for the frame, or the user stops it
+				break
+			previous = time
+			for y in range(0, len(rows)):
+				screen.write_text(0, y, rows[y])
+			screen.show()
+	finally:
+		tinygame.quit()
+		recording.close()
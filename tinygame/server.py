@@ -0,0 +1,262 @@
+"""
+server
+A submodule of tinygame which hosts a game for many players at once over the network from one program. eg for a kiosk or an arcade
+
+Players connect with telnet (or any raw TCP client with its console in raw mode) and each gets their own session of the game, with its own display and keyboard.
+eg
+ python -m tinygame serve examples/snake.py --port 2323
+and then each player
+ telnet localhost 2323
+
+The network side uses asyncio: a task for each connection reads the player's keys and sends them the frames, which are diffed just like for the console (see character_display.Terminal).
+The games are ordinary tinygame programs which wait for keys and sleep between frames, so each session's game runs in its own thread,
+with the Session as its backend (see backend.py) instead of the console. A game thread waiting for a key or its next frame costs very little, so one program can host hundreds of sessions
+"""
+
+import asyncio
+import runpy
+import threading
+import time
+import traceback
+import tinygame.backend as backend
+from tinygame.keyboard import EventQueue, KeyDecoder
+from tinygame.character_display import Terminal, CLEAR_SEQUENCE, HIDE_CURSOR_SEQUENCE, SHOW_CURSOR_SEQUENCE, MOVE_HOME_SEQUENCE
+
+# Telnet commands. See https://en.wikipedia.org/wiki/Telnet and RFC 854
+IAC = 255 # Interpret As Command. Starts every telnet command
+SE = 240 # end of a subnegotiation
+SB = 250 # start of a subnegotiation, which lasts until IAC SE
+WILL, WONT, DO, DONT = 251, 252, 253, 254 # option negotiation. Each is followed by an option
+ECHO = 1 # the option for which side echoes typed characters
+SUPPRESS_GO_AHEAD = 3 # the option for sending characters as they are typed rather than a line at a time
+LINEMODE = 34 # the option for the client editing a line before sending it
+NEGOTIATION = bytes([IAC, WILL, ECHO, IAC, WILL, SUPPRESS_GO_AHEAD, IAC, DONT, LINEMODE]) # asks the player's telnet to send each key as it is pressed and not show it, like the keyboard module does for the console
+
+MAX_BUFFERED = 64*1024 # the most bytes waiting to be sent to a player. If there are more, frames are skipped until their connection catches up
+
+class Disconnected(Exception):
+	"""
+	Raised in a game's thread when its player has gone, to end the game
+	"""
+	pass
+
+class SessionTerminal(Terminal):
+	"""
+	A Terminal (see character_display.py) for a player's console at the other end of a connection
+	"""
+	def __init__(self, session):
+		Terminal.__init__(self)
+		self.session = session
+		self.newline = b'\r\n' # telnet doesn't turn '\n' into a carriage return and line feed like a local console does
+
+	def write(self, output):
+		self.session.send(bytes(output), True) # copied because self.buffer is used again for the next frame
+
+	def encoding(self):
+		return 'utf-8', 'replace'
+
+class Session():
+	"""
+	One player's connection and game. It is the backend (see backend.py) of the game's thread, so the game's displays and keyboard are the player's
+	"""
+	def __init__(self, loop, writer):
+		"""
+		loop: the asyncio event loop handling the connection
+		writer: the asyncio StreamWriter for sending to the player
+		"""
+		self.loop = loop
+		self.writer = writer
+		self.terminal = SessionTerminal(self) # what the player's console shows
+		self.events = EventQueue() # keys from the player waiting for the game
+		self.condition = threading.Condition() # guards self.events and wakes up the game when a key arrives or the player leaves
+		self.closed = threading.Event() # set when the player has gone
+		self.behind = False # set when frames were skipped because the player's connection couldn't keep up. The next frame is then drawn in full
+		self.telnet = b'' # the start of a telnet command which was cut off at the end of what was received
+		self.decoder = KeyDecoder() # turns the bytes received into keys, even when a key is split between two reads
+		self.carriage_return = False # whether the last byte received was a carriage return, so a line feed or NUL after it is part of the same Enter
+		self.escape_timer = None # decides a lone ESC was the Esc key if nothing more comes. See KeyDecoder.flush()
+
+	def feed(self, data):
+		"""
+		Takes bytes received from the player and turns them into keys for the game, like keyboard.read_console() does for the console. Called in the event loop
+		"""
+		data, self.telnet = strip_telnet(self.telnet + data)
+		if b'\r' in data or self.carriage_return: data = self.enter(data)
+		now = time.perf_counter()
+		self.add(self.decoder.feed(data, now), now)
+		deadline = self.decoder.deadline()
+		if self.escape_timer is not None: self.escape_timer.cancel()
+		self.escape_timer = self.loop.call_later(deadline - now, self.flush) if deadline is not None else None
+
+	def enter(self, data):
+		"""
+		return: the bytes received with each Enter as a line feed. Telnet sends a carriage return for Enter, followed by a line feed or NUL, we want KEY_ENTER
+		"""
+		if self.carriage_return and data[:1] in (b'\n', b'\0'): data = data[1:] # the rest of an Enter cut off at the end of the last bytes received
+		self.carriage_return = data[-1:] == b'\r'
+		return data.replace(b'\r\n', b'\n').replace(b'\r\0', b'\n').replace(b'\r', b'\n')
+
+	def flush(self):
+		"""
+		Gives the game a lone ESC as the Esc key once it has waited long enough. Called in the event loop
+		"""
+		self.escape_timer = None
+		now = time.perf_counter()
+		self.add(self.decoder.flush(None), now)
+
+	def add(self, keys, timestamp):
+		"""
+		Gives the game keys from the player and wakes it up if it is waiting for one
+		"""
+		if not keys: return
+		with self.condition:
+			self.events.add(keys, timestamp)
+			self.condition.notify()
+
+	def send(self, data, droppable = False):
+		"""
+		Sends bytes to the player. Called in the game's thread
+
+		droppable: True for frames, which are skipped if the player's connection can't keep up
+		"""
+		if not self.closed.is_set():
+			self.loop.call_soon_threadsafe(self.send_now, data, droppable)
+
+	def send_now(self, data, droppable):
+		"""
+		Sends bytes to the player, now that we are in the event loop
+		"""
+		transport = self.writer.transport
+		if transport.is_closing(): return
+		if droppable and transport.get_write_buffer_size() > MAX_BUFFERED:
+			self.behind = True # the player's console won't show this frame so the next one has to draw everything
+			return
+		self.writer.write(data)
+
+	def close(self):
+		"""
+		Ends the session because the player has gone. The game's thread finds out next time it shows a frame, waits for a key or sleeps
+		"""
+		with self.condition:
+			self.closed.set()
+			self.condition.notify() # wake up the game if it is waiting for a key
+
+	def run_game(self, game):
+		"""
+		Runs the game for this session. This is the game's thread
+
+		game: the file name of the game's python program
+		"""
+		backend.use_in_thread(self)
+		try:
+			runpy.run_path(game, run_name = "__main__") # the game's own code sees this session as the console and keyboard
+		except (Disconnected, SystemExit):
+			pass
+		except Exception:
+			traceback.print_exc() # a bug in the game only ends this session
+		finally:
+			backend.use_in_thread(None)
+			self.loop.call_soon_threadsafe(self.writer.close)
+
+	# the backend. See backend.py
+
+	def initialize(self, render_thread = False):
+		self.terminal.invalidate()
+		self.send((CLEAR_SEQUENCE + MOVE_HOME_SEQUENCE + HIDE_CURSOR_SEQUENCE).encode())
+
+	def quit(self):
+		self.send((CLEAR_SEQUENCE + MOVE_HOME_SEQUENCE + SHOW_CURSOR_SEQUENCE).encode())
+
+	def present(self, rows, scrolled = 0):
+		if self.closed.is_set(): raise Disconnected()
+		if self.behind:
+			self.behind = False
+			self.terminal.invalidate()
+		self.terminal.present(rows, scrolled)
+
+	def invalidate(self):
+		self.terminal.invalidate()
+
+	def poll_events(self):
+		if self.closed.is_set(): raise Disconnected()
+		with self.condition:
+			return self.events.take_all()
+
+	def next_event(self, timeout = 0):
+		with self.condition:
+			if not self.events.events and not self.closed.is_set() and timeout > 0:
+				self.condition.wait(timeout)
+			if self.closed.is_set(): raise Disconnected()
+			return self.events.take()
+
+	def time(self):
+		return time.perf_counter()
+
+	def sleep(self, seconds):
+		if self.closed.wait(max(0, seconds)): raise Disconnected()
+
+def strip_telnet(data):
+	"""
+	Takes the telnet commands out of bytes received from a player
+
+	return: a pair of the bytes without the commands, and the start of a command cut off at the end (to go in front of what is received next)
+	"""
+	if IAC not in data: return data, b'' # almost always
+	output = bytearray()
+	i = 0
+	while i < len(data):
+		if data[i] != IAC:
+			output.append(data[i])
+			i += 1
+			continue
+		if i + 1 >= len(data): return bytes(output), data[i:]
+		command = data[i + 1]
+		if command == IAC: # an escaped 255
+			output.append(IAC)
+			i += 2
+		elif command == SB:
+			end = data.find(bytes([IAC, SE]), i + 2)
+			if end < 0: return bytes(output), data[i:]
+			i = end + 2
+		elif command in (WILL, WONT, DO, DONT):
+			if i + 2 >= len(data): return bytes(output), data[i:]
+			i += 3
+		else:
+			i += 2
+	return bytes(output), b''
+
+async def handle(reader, writer, game):
+	"""
+	Looks after one player's connection until they leave or their game ends
+	"""
+	session = Session(asyncio.get_running_loop(), writer)
+	writer.write(NEGOTIATION)
+	threading.Thread(target = session.run_game, args = (game,), name = "tinygame session", daemon = True).start()
+	try:
+		while True:
+			data = await reader.read(4096)
+			if not data: break # the player left, or the game ended and closed the connection
+			session.feed(data)
+	except ConnectionError:
+		pass
+	finally:
+		session.close()
+		writer.close()
+
+def serve(game, host = "127.0.0.1", port = 2323):
+	"""
+	Hosts a game for players connecting over the network until interrupted (eg with Ctrl-C)
+
+	game: the file name of the game's python program. eg examples/snake.py
+	host: the address to accept connections on. The default only accepts connections from this computer
+	port: the TCP port to accept connections on
+	"""
+	async def main():
+		server = await asyncio.start_server(lambda reader, writer: handle(reader, writer, game), host, port)
+		print("Serving %s on %s port %d" % (game, host, port))
+		async with server:
+			await server.serve_forever()
+	try:
+		asyncio.run(main())
+	except KeyboardInterrupt:
+		pass
@@ -0,0 +1,188 @@
+"""
+stats
+A submodule of tinygame which counts the work done drawing and showing each frame. eg how many cells were written, how many rows were turned into text and how many bytes reached the console
+
+Turn it on without changing the game by setting the TINYGAME_STATS environment variable to 1, or to the name of a file to write the counts of every frame to, eg
+ TINYGAME_STATS=frames.csv python examples/breakout.py	(a CSV file, with a row for each frame)
+ TINYGAME_STATS=frames.jsonl python examples/breakout.py	(JSON lines, a line for each frame)
+or by calling enable() before tinygame.initialize(), and read the counts with snapshot() eg
+
+tinygame.stats.enable()
+...
+print(tinygame.stats.snapshot()['cells_blitted'])
+
+It works by swapping the methods being counted for ones which count and then do the same thing, and swapping them back in disable().
+So when it is off the methods are exactly the ones in character_map.py and character_display.py and counting costs nothing
+"""
+
+import json
+import tinygame.character_map as character_map
+import tinygame.character_display as character_display
+
+COUNTERS = [
+	'cells_set', # single cells set with map[x, y] = c
+	'draw_image_calls', # draw_image() and Sprite.draw()
+	'cells_blitted', # the cells of the images drawn with draw_image(), after clipping
+	'fill_calls', # fill()
+	'cells_filled', # the cells filled
+	'write_text_calls', # write_text() and write_text_aligned()
+	'characters_written', # the characters in their text, not counting newlines or clipping
+	'scroll_calls', # scroll_up(), scroll_down(), scroll_left() and scroll_right()
+	'rows_scrolled', # the rows and columns scrolled by
+	'show_calls', # CharacterDisplay.show()
+	'frames_shown', # the show() calls which actually had something new to show
+	'rows_serialized', # the rows turned into text by show()
+	'bytes_written', # the bytes written to the console
+]
+
+counters = {name: 0 for name in COUNTERS} # the counts since the last reset()
+enabled = False # whether the methods are swapped for counting ones
+hooks = [] # (owner, name, original) for each method swapped, so they can be put back
+busy = {} # whether a method of each kind is already counting, so eg CharacterDisplay.fill() calling CharacterMap.fill() only counts once
+output = None # the file the counts of every frame are written to, or None
+output_format = None # 'csv' or 'jsonl'
+previous = None # the counts as of the last frame written to output
+frame = 0 # the number of the frame written to output next
+
+def snapshot():
+	"""
+	return: a dictionary of the counts since the last reset(), by the names in COUNTERS. It is a copy so it doesn't change as counting goes on
+	"""
+	return dict(counters)
+
+def reset():
+	"""
+	Sets all the counts back to 0
+	"""
+	global previous
+	for name in COUNTERS: counters[name] = 0
+	if previous is not None: previous = snapshot()
+
+def clipped(x, y, width, height, character_map):
+	"""
+	return: how many cells of a width by height rectangle at x, y are on the character_map
+	"""
+	return max(0, min(character_map.width, x + width) - max(0, x))*max(0, min(character_map.height, y + height) - max(0, y))
+
+# what is counted for each kind of method. Each is called with the same arguments as the method
+
+def count_setitem(self, x_y, value):
+	counters['cells_set'] += 1
+
+def count_draw_image(self, x, y, image, chromakey = None):
+	counters['draw_image_calls'] += 1
+	counters['cells_blitted'] += clipped(x, y, image.width, image.height, self)
+
+def count_sprite_draw(self, image, x, y):
+	counters['draw_image_calls'] += 1
+	counters['cells_blitted'] += clipped(x, y, self.width, self.height, image)
+
+def count_fill(self, character):
+	counters['fill_calls'] += 1
+	counters['cells_filled'] += self.width*self.height
+
+def count_write_text(self, x, y, text):
+	counters['write_text_calls'] += 1
+	counters['characters_written'] += len(text) - text.count('\n')
+
+def count_write_text_aligned(self, x, y, width, text, align = 'left'):
+	count_write_text(self, x, y, text)
+
+def count_scroll(self, amount = 1):
+	counters['scroll_calls'] += 1
+	counters['rows_scrolled'] += abs(amount)
+
+def count_show(self):
+	counters['show_calls'] += 1
+	if self.dirty:
+		counters['frames_shown'] += 1
+		counters['rows_serialized'] += len(self.dirty_rows)
+
+def count_write(output):
+	counters['bytes_written'] += len(output)
+
+def hook(owner, name, kind, count, after = None):
+	"""
+	Swaps a method for one which counts and then calls the original
+
+	owner: the class (or object) it is in
+	name: its name
+	kind: the kind of method. When a method calls another of the same kind only the first one counts
+	count: the function which counts. See above
+	after: a function called with no arguments after the original, if any
+	"""
+	original = getattr(owner, name)
+	hooks.append((owner, name, vars(owner).get(name))) # None if it was inherited from a class
+	busy[kind] = False
+	def counting(*arguments, **keywords):
+		if busy[kind]: return original(*arguments, **keywords) # already counted by the method which called this one
+		busy[kind] = True
+		try:
+			count(*arguments, **keywords)
+			return original(*arguments, **keywords)
+		finally:
+			busy[kind] = False
+			if after is not None: after()
+	counting.__name__, counting.__doc__ = original.__name__, original.__doc__
+	setattr(owner, name, counting)
+
+def enable(path = None):
+	"""
+	Starts counting. Call it before tinygame.initialize() and before starting the profiler (see profile.py) if it is used too
+
+	path: the name of a file to write the counts of each frame shown to, or None. If it ends with .csv it is a CSV file with a header row, otherwise it is JSON lines
+	"""
+	global enabled, output, output_format, previous, frame
+	if enabled: return
+	enabled = True
+	classes = []
+	for owner in (character_map.CharacterMap, character_map.CharacterMapView, character_map.NumpyCharacterMap, character_display.CharacterDisplay):
+		if owner not in classes: classes.append(owner) # NumpyCharacterMap is CharacterMap when numpy isn't installed
+	for owner in classes: # only the methods each class has of its own, the rest are inherited
+		methods = vars(owner)
+		if '__setitem__' in methods: hook(owner, '__setitem__', 'setitem', count_setitem)
+		if 'draw_image' in methods: hook(owner, 'draw_image', 'draw_image', count_draw_image)
+		if 'fill' in methods: hook(owner, 'fill', 'fill', count_fill)
+		if 'write_text' in methods: hook(owner, 'write_text', 'write_text', count_write_text)
+		if 'write_text_aligned' in methods: hook(owner, 'write_text_aligned', 'write_text', count_write_text_aligned)
+		for name in ('scroll_up', 'scroll_down', 'scroll_left', 'scroll_right'):
+			if name in methods: hook(owner, name, 'scroll', count_scroll)
+	hook(character_map.Sprite, 'draw', 'draw_image', count_sprite_draw)
+	hook(character_display.CharacterDisplay, 'show', 'show', count_show, write_frame if path is not None else None)
+	hook(character_display.terminal, 'write', 'write', count_write) # with a writer thread (see Terminal.start_thread()) the bytes are counted in whatever frame they are written in
+	if path is not None:
+		output = open(path, 'w')
+		output_format = 'csv' if path.endswith('.csv') else 'jsonl'
+		if output_format == 'csv': output.write(','.join(['frame'] + COUNTERS) + '\n')
+		previous = snapshot()
+		frame = 0
+
+def write_frame():
+	"""
+	Writes the counts since the frame before to the output file, if a frame was shown. Called after each CharacterDisplay.show()
+	"""
+	global previous, frame
+	if counters['frames_shown'] == previous['frames_shown']: return # nothing was shown so it wasn't a frame
+	counts = [counters[name] - previous[name] for name in COUNTERS]
+	if output_format == 'csv':
+		output.write(','.join(str(count) for count in [frame] + counts) + '\n')
+	else:
+		output.write(json.dumps(dict(zip(['frame'] + COUNTERS, [frame] + counts))) + '\n')
+	previous = snapshot()
+	frame += 1
+
+def disable():
+	"""
+	Stops counting and puts the original methods back. The counts so far can still be read with snapshot()
+	"""
+	global enabled, output, previous
+	if not enabled: return
+	for owner, name, original in reversed(hooks):
+		if original is None: delattr(owner, name) # it was inherited, so taking ours away leaves the inherited one
+		else: setattr(owner, name, original)
+	del hooks[:]
+	enabled = False
+	if output is not None:
+		output.close()
+		output = None
+		previous = None